@@ -0,0 +1,307 @@
+"""Benchmark de las etapas de Weebnizador sobre un corpus sintético.
+
+Genera pistas ASS en inglés, malayo y español con la cantidad de líneas, densidad de honoríficos,
+densidad de nombres y desfase de tiempos que se pidan, opcionalmente las mete en un MKV pequeño
+(si MKVToolNix está disponible) y mide cada etapa. El resultado se guarda en JSON para poder
+comparar corridas:
+
+    python benchmark_weebnizador.py --tamanos 200 2000 20000 --salida antes.json
+    python benchmark_weebnizador.py --salida despues.json --comparar antes.json
+
+Con --motor-extraccion nativo y sin MKVToolNix, el MKV se arma con escribir_mkv_sintetico (una pista
+de video de relleno y las pistas ASS, con Cues y estadísticas como las que escribe mkvmerge).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+import pysubs2
+
+import weebnizador_motor as motor
+
+NOMBRES_PILA = ["Naruto", "Sakura", "Hinata", "Kakashi", "Yuki", "Aoi", "Haruto", "Rin", "Sora", "Kaito", "Mei", "Ren", "Hana", "Takumi", "Akari", "Yuto"]
+APELLIDOS = ["Uzumaki", "Haruno", "Hyuga", "Hatake", "Tanaka", "Suzuki", "Sato", "Takahashi", "Watanabe", "Ito", "Yamamoto", "Nakamura", "Kobayashi"]
+FRASES_INGLES = ["I can't believe you did that.", "We have to go now!", "Is this really the end?", "Thanks for everything.", "Wait for me!"]
+FRASES_MALAYO = ["Saya tidak percaya.", "Kita perlu pergi sekarang!", "Terima kasih.", "Tunggu saya!"]
+FRASES_ESPANOL = ["No puedo creer que hicieras eso.", "¡Tenemos que irnos ya!", "¿De verdad es el final?", "Gracias por todo.", "¡Espérame!"]
+TRATAMIENTOS = ["señor", "señorita", "la señorita", "señora"]
+
+def generar_corpus(lineas, densidad_honorificos=0.3, densidad_nombres=0.2, desfase_ms=0, jitter_ms=300, semilla=1):
+    """Devuelve {'eng', 'may', 'spa'} -> SSAFile con `lineas` eventos cada uno.
+
+    densidad_honorificos: fracción de líneas fuente con 'Nombre-honorífico'.
+    densidad_nombres: fracción de líneas en español con un 'Nombre Apellido' completo.
+    desfase_ms: corrimiento fijo del español respecto a la fuente; jitter_ms: ruido por línea.
+    """
+    azar = random.Random(semilla)
+    pistas = {clave: pysubs2.SSAFile() for clave in ('eng', 'may', 'spa')}
+    inicio = 0
+    # ASS no admite tiempos de más de 9:59:59; con muchas líneas se acortan las pausas para no pasarse
+    paso_maximo = max(400, min(4000, 48_000_000 // max(lineas, 1)))
+    for _ in range(lineas):
+        inicio += azar.randint(paso_maximo // 4, paso_maximo)
+        fin = inicio + azar.randint(900, 3500)
+        nombre = azar.choice(NOMBRES_PILA)
+        frase_idx = azar.randrange(len(FRASES_INGLES))
+        if azar.random() < densidad_honorificos:
+            honorifico = azar.choice(motor.honorificos)
+            texto_eng = f"{nombre}{honorifico}, {FRASES_INGLES[frase_idx].lower()}"
+            texto_may = f"{nombre}{honorifico}, {azar.choice(FRASES_MALAYO).lower()}"
+            texto_spa = f"{azar.choice(TRATAMIENTOS).capitalize()} {nombre}, {FRASES_ESPANOL[frase_idx % len(FRASES_ESPANOL)].lower()}"
+        else:
+            texto_eng = FRASES_INGLES[frase_idx]
+            texto_may = azar.choice(FRASES_MALAYO)
+            texto_spa = FRASES_ESPANOL[frase_idx % len(FRASES_ESPANOL)]
+        if azar.random() < densidad_nombres:
+            texto_spa += f"\\N{nombre} {azar.choice(APELLIDOS)} está aquí."
+        pistas['eng'].append(pysubs2.SSAEvent(start=inicio, end=fin, text=texto_eng))
+        pistas['may'].append(pysubs2.SSAEvent(start=inicio, end=fin, text=texto_may))
+        inicio_spa = max(0, inicio + desfase_ms + azar.randint(-jitter_ms, jitter_ms))
+        pistas['spa'].append(pysubs2.SSAEvent(start=inicio_spa, end=inicio_spa + (fin - inicio), text=texto_spa))
+    pistas['spa'].append(pysubs2.SSAEvent(start=inicio + 5000, end=inicio + 9000, text="Traducción: Fansub Sintético"))
+    return pistas
+
+def gemini_simulado(prompt_text, name_list_for_api):
+    """Modelo falso: invierte los pares cuya segunda palabra es un apellido conocido."""
+    invertidos = []
+    for par in name_list_for_api.split("\n"):
+        partes = par.split()
+        if len(partes) == 2 and partes[1] in APELLIDOS: invertidos.append(f"{partes[1]} {partes[0]}")
+    return "\n".join(invertidos)
+
+def mkvmerge_disponible():
+    if os.path.isfile(motor.mkvmerge_path) and os.path.isfile(motor.mkvextract_path): return True
+    encontrados = shutil.which("mkvmerge"), shutil.which("mkvextract")
+    if all(encontrados):
+        motor.mkvmerge_path, motor.mkvextract_path = encontrados
+        return True
+    return False
+
+def crear_mkv(rutas_ass, ruta_mkv):
+    comando = [motor.mkvmerge_path, "-o", ruta_mkv]
+    for idioma, nombre_pista in (('eng', 'English'), ('may', 'CR_Malay'), ('spa', 'Latam')):
+        comando += ["--language", f"0:{idioma}", "--track-name", f"0:{nombre_pista}", rutas_ass[idioma]]
+    subprocess.run(comando, check=True, capture_output=True)
+
+def _ebml(id_elemento, datos):
+    largo = 1
+    while len(datos) >= (1 << (7 * largo)) - 1: largo += 1
+    return id_elemento.to_bytes((id_elemento.bit_length() + 7) // 8, 'big') + (len(datos) | (1 << (7 * largo))).to_bytes(largo, 'big') + datos
+
+def _ebml_uint(id_elemento, valor, largo=None):
+    return _ebml(id_elemento, valor.to_bytes(largo or max(1, (valor.bit_length() + 7) // 8), 'big'))
+
+def escribir_mkv_sintetico(pistas, ruta, comprimir=False, con_cues=True, bytes_video=4000):
+    """Escribe un MKV mínimo con una pista de video de relleno (un cuadro cada 500 ms) y las pistas ASS dadas.
+
+    pistas: lista de (SSAFile, idioma, nombre de la pista). Con comprimir=True los bloques de subtítulos
+    van con zlib, como los guarda mkvmerge por defecto. Sirve para probar y medir weebnizador_matroska
+    sin MKVToolNix.
+    """
+    from weebnizador_matroska import (ID_EBML, ID_DOCTYPE, ID_SEGMENTO, ID_SEEKHEAD, ID_SEEK, ID_SEEK_ID, ID_SEEK_POSICION, ID_INFO,
+                                      ID_ESCALA_TIEMPO, ID_TRACKS, ID_TRACK_ENTRY, ID_TRACK_NUMERO, ID_TRACK_UID, ID_TRACK_TIPO, ID_NOMBRE,
+                                      ID_IDIOMA, ID_CODEC, ID_CODEC_PRIVADO, ID_CODIFICACIONES, ID_CODIFICACION, ID_CODIFICACION_ALCANCE,
+                                      ID_COMPRESION, ID_COMPRESION_ALGORITMO, ID_CUES, ID_CUE_POINT, ID_CUE_POSICIONES, ID_CUE_TRACK,
+                                      ID_CUE_TIEMPO, ID_CUE_CLUSTER, ID_CUE_RELATIVA, ID_TAGS, ID_TAG, ID_TAG_OBJETIVOS, ID_TAG_TRACK_UID, ID_SIMPLE_TAG,
+                                      ID_TAG_NOMBRE, ID_TAG_TEXTO, ID_CLUSTER, ID_CLUSTER_TIEMPO, ID_SIMPLE_BLOCK, ID_BLOCK_GROUP, ID_BLOCK,
+                                      ID_BLOCK_DURACION)
+    entradas = [_ebml(ID_TRACK_ENTRY, _ebml_uint(ID_TRACK_NUMERO, 1) + _ebml_uint(ID_TRACK_UID, 1001) + _ebml_uint(ID_TRACK_TIPO, 1) + _ebml(ID_CODEC, b"V_UNCOMPRESSED"))]
+    bloques = [] # (tiempo ms, número de pista, duración o None, datos)
+    fin_total = 0
+    for numero, (subs, idioma, nombre) in enumerate(pistas, start=2):
+        texto = subs.to_string("ass")
+        cabecera = texto[:texto.index("\n", texto.index("[Events]") + len("[Events]\n")) + 1]
+        privado = cabecera.encode('utf-8')
+        codificacion = b""
+        if comprimir:
+            codificacion = _ebml(ID_CODIFICACIONES, _ebml(ID_CODIFICACION, _ebml_uint(ID_CODIFICACION_ALCANCE, 1) + _ebml(ID_COMPRESION, _ebml_uint(ID_COMPRESION_ALGORITMO, 0))))
+        entradas.append(_ebml(ID_TRACK_ENTRY, _ebml_uint(ID_TRACK_NUMERO, numero) + _ebml_uint(ID_TRACK_UID, 1000 + numero) + _ebml_uint(ID_TRACK_TIPO, 17)
+                              + _ebml(ID_NOMBRE, nombre.encode()) + _ebml(ID_IDIOMA, idioma.encode()) + _ebml(ID_CODEC, b"S_TEXT/ASS")
+                              + _ebml(ID_CODEC_PRIVADO, privado) + codificacion))
+        # Como mkvmerge, solo se guardan los Dialogue
+        for orden, evento in enumerate(evento for evento in subs if not evento.is_comment):
+            datos = f"{orden},{evento.layer},{evento.style},{evento.name},{evento.marginl},{evento.marginr},{evento.marginv},{evento.effect},{evento.text}".encode('utf-8')
+            bloques.append((evento.start, numero, evento.end - evento.start, zlib.compress(datos) if comprimir else datos))
+            fin_total = max(fin_total, evento.end)
+    bloques += [(tiempo, 1, None, bytes(bytes_video)) for tiempo in range(0, fin_total, 500)]
+    bloques.sort(key=lambda bloque: (bloque[0], bloque[1]))
+
+    # Clusters de hasta 5 s; se guarda la posición de cada bloque de subtítulos para los Cues
+    clusters, cues, cuadros = [], [], {}
+    posicion = 0
+    i = 0
+    while i < len(bloques):
+        inicio_cluster = bloques[i][0]
+        cuerpo = _ebml_uint(ID_CLUSTER_TIEMPO, inicio_cluster)
+        while i < len(bloques) and bloques[i][0] - inicio_cluster < 5000:
+            tiempo, numero, duracion, datos = bloques[i]
+            cabecera_bloque = bytes([0x80 | numero]) + (tiempo - inicio_cluster).to_bytes(2, 'big', signed=True)
+            if duracion is None: elemento = _ebml(ID_SIMPLE_BLOCK, cabecera_bloque + bytes([0x80]) + datos)
+            else:
+                elemento = _ebml(ID_BLOCK_GROUP, _ebml(ID_BLOCK, cabecera_bloque + b"\0" + datos) + _ebml_uint(ID_BLOCK_DURACION, duracion))
+                cues.append((tiempo, numero, posicion, len(cuerpo)))
+                cuadros[numero] = cuadros.get(numero, 0) + 1
+            cuerpo += elemento
+            i += 1
+        cluster = _ebml(ID_CLUSTER, cuerpo)
+        clusters.append(cluster)
+        posicion += len(cluster)
+
+    info = _ebml(ID_INFO, _ebml_uint(ID_ESCALA_TIEMPO, 1_000_000))
+    tracks = _ebml(ID_TRACKS, b"".join(entradas))
+    # Las posiciones del SeekHead van con 8 bytes fijos, así su tamaño no depende de ellas
+    seek = lambda id_elemento, pos: _ebml(ID_SEEK, _ebml(ID_SEEK_ID, id_elemento.to_bytes(4, 'big')) + _ebml_uint(ID_SEEK_POSICION, pos, 8))
+    tamano_seekhead = len(_ebml(ID_SEEKHEAD, seek(ID_INFO, 0) * (4 if con_cues else 3)))
+    inicio_clusters = tamano_seekhead + len(info) + len(tracks)
+    inicio_cues = inicio_clusters + posicion
+    cues_bytes = b""
+    if con_cues:
+        cues_bytes = _ebml(ID_CUES, b"".join(
+            _ebml(ID_CUE_POINT, _ebml_uint(ID_CUE_TIEMPO, tiempo) + _ebml(ID_CUE_POSICIONES, _ebml_uint(ID_CUE_TRACK, numero) + _ebml_uint(ID_CUE_CLUSTER, inicio_clusters + pos_cluster)
+                                                                + _ebml_uint(ID_CUE_RELATIVA, relativa)))
+            for tiempo, numero, pos_cluster, relativa in cues))
+    tags = _ebml(ID_TAGS, b"".join(
+        _ebml(ID_TAG, _ebml(ID_TAG_OBJETIVOS, _ebml_uint(ID_TAG_TRACK_UID, 1000 + numero)) + _ebml(ID_SIMPLE_TAG, _ebml(ID_TAG_NOMBRE, b"NUMBER_OF_FRAMES") + _ebml(ID_TAG_TEXTO, str(cantidad).encode())))
+        for numero, cantidad in cuadros.items()))
+    seekhead = _ebml(ID_SEEKHEAD, seek(ID_INFO, tamano_seekhead) + seek(ID_TRACKS, tamano_seekhead + len(info))
+                     + (seek(ID_CUES, inicio_cues) if con_cues else b"") + seek(ID_TAGS, inicio_cues + len(cues_bytes)))
+    segmento = seekhead + info + tracks + b"".join(clusters) + cues_bytes + tags
+    with open(ruta, "wb") as f:
+        f.write(_ebml(ID_EBML, _ebml(ID_DOCTYPE, b"matroska")))
+        f.write(_ebml(ID_SEGMENTO, segmento))
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return {"min_s": min(tiempos), "mediana_s": statistics.median(tiempos), "repeticiones": repeticiones}
+
+def contar_fragmentos_un_archivo(ruta_mkv):
+    """Procesa el MKV como un lote de un solo archivo y devuelve en cuántos tramos se repartió la búsqueda de honoríficos."""
+    motor_lote = motor.MotorWeebnizador('multi')
+    motor_lote.llamar_gemini = gemini_simulado
+    motor_lote.forzar = True
+    motor_lote.procesar_lote([ruta_mkv])
+    return sum(medicion.contadores.get("fragmentos_honorificos", 0) for medicion in motor_lote.mediciones)
+
+def medir_tamano(lineas, args, carpeta, con_mkv):
+    pistas = generar_corpus(lineas, args.densidad_honorificos, args.densidad_nombres, args.desfase_ms, semilla=args.semilla)
+    rutas = {}
+    for clave, subs in pistas.items():
+        rutas[clave] = os.path.join(carpeta, f"bench_{lineas}_{clave}.ass")
+        subs.save(rutas[clave])
+    fuentes = {clave: motor.SubtituloEnMemoria(os.path.basename(ruta), open(ruta, encoding='utf-8').read()) for clave, ruta in rutas.items()}
+    motor_bench = motor.MotorWeebnizador('multi', workers=1)
+    motor_bench.llamar_gemini = gemini_simulado
+    etapas = {}
+    resultado = {"lineas": lineas}
+
+    if con_mkv:
+        ruta_mkv = os.path.join(carpeta, f"bench_{lineas}.mkv")
+        if mkvmerge_disponible(): crear_mkv(rutas, ruta_mkv)
+        else: escribir_mkv_sintetico([(pistas[clave], clave, nombre) for clave, nombre in (('eng', 'English'), ('may', 'CR_Malay'), ('spa', 'Latam'))], ruta_mkv, comprimir=True)
+        cache_previa = motor.usar_cache_identify
+        motor.usar_cache_identify = False # medir mkvmerge/mkvextract reales, no la cache
+        try: etapas["extraccion"] = medir(lambda: motor_bench._extract_subtitles_metadata(ruta_mkv), args.repeticiones)
+        finally: motor.usar_cache_identify = cache_previa
+        # Una pista larga tiene que repartirse en tramos aunque el lote sea de un solo archivo
+        if lineas >= 2 * (motor.lineas_por_fragmento or 0) and motor.MotorWeebnizador('multi')._reparte_pistas_largas():
+            resultado["fragmentos_un_archivo"] = contar_fragmentos_un_archivo(ruta_mkv)
+
+    directa = args.lectura_directa
+    etapas["carga"] = medir(lambda: [motor.cargar_subtitulo(fuente, directa) for fuente in fuentes.values()], args.repeticiones)
+    etapas["eliminar_creditos"] = medir(lambda: motor.eliminar_creditos(motor.cargar_subtitulo(fuentes['spa'], directa)), args.repeticiones)
+    # Incluye carga y limpieza de créditos, como en el proceso real
+    etapas["honorificos"] = medir(lambda: motor.weebificar_subtitulos(fuentes['eng'], fuentes['spa'], fuentes['may']), args.repeticiones)
+    subs_weeb, _ = motor.weebificar_subtitulos(fuentes['eng'], fuentes['spa'], fuentes['may'])
+    texto_weeb = motor.SubtituloEnMemoria("weeb.ass", subs_weeb.to_string("ass"))
+    etapas["nombres"] = medir(lambda: motor_bench._invertir_nombres_via_gemini(motor.cargar_subtitulo(texto_weeb, directa, para_guardar=True)), args.repeticiones)
+    ruta_salida = os.path.join(carpeta, f"bench_{lineas}_salida.ass")
+    etapas["guardado"] = medir(lambda: subs_weeb.save(ruta_salida), args.repeticiones)
+    resultado.update(etapas=etapas, total_mediana_s=sum(etapa["mediana_s"] for etapa in etapas.values()))
+    return resultado
+
+def comparar(actual, anterior):
+    previos = {resultado["lineas"]: resultado for resultado in anterior["resultados"]}
+    print(f"\n{'líneas':>8} {'etapa':<18} {'antes (s)':>10} {'ahora (s)':>10} {'cambio':>8}")
+    for resultado in actual["resultados"]:
+        previo = previos.get(resultado["lineas"])
+        if not previo: continue
+        for etapa, medida in resultado["etapas"].items():
+            if etapa not in previo["etapas"]: continue
+            antes, ahora = previo["etapas"][etapa]["mediana_s"], medida["mediana_s"]
+            print(f"{resultado['lineas']:>8} {etapa:<18} {antes:>10.4f} {ahora:>10.4f} {ahora / antes if antes else float('inf'):>7.2f}x")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de las etapas de Weebnizador con subtítulos sintéticos")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[200, 1000, 5000, 20000], help="Cantidad de líneas por pista")
+    parser.add_argument("--densidad-honorificos", type=float, default=0.3)
+    parser.add_argument("--densidad-nombres", type=float, default=0.2)
+    parser.add_argument("--desfase-ms", type=int, default=0, help="Corrimiento del español respecto a la fuente")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--lectura-directa", action="store_true", help="Medir con weebnizador_lector en lugar de pysubs2")
+    parser.add_argument("--alineacion", choices=["local", "global"], default="local")
+    parser.add_argument("--desfase", action="store_true", help="Estimar el desfase del español y buscar en una ventana más chica (combinar con --desfase-ms)")
+    parser.add_argument("--motor-extraccion", choices=["mkvtoolnix", "nativo"], default="mkvtoolnix", help="Cómo se leen las pistas del MKV en la etapa de extracción")
+    parser.add_argument("--sin-clasificador", action="store_true", help="Mandar todos los pares al Gemini simulado, sin el clasificador local de nombres")
+    parser.add_argument("--sin-mkv", action="store_true", help="No crear MKV aunque MKVToolNix esté disponible")
+    parser.add_argument("--salida", default="bench_output.json", help="Archivo JSON de resultados")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para mostrar la diferencia")
+    args = parser.parse_args(argv)
+
+    motor.usar_lectura_directa = args.lectura_directa
+    motor.alineacion_honorificos = args.alineacion
+    motor.estimar_desfase = args.desfase
+    motor.motor_extraccion = args.motor_extraccion
+    motor.usar_clasificador_nombres = not args.sin_clasificador
+    # El lector nativo no necesita MKVToolNix: sin él, el MKV se arma con escribir_mkv_sintetico
+    con_mkv = not args.sin_mkv and (args.motor_extraccion == "nativo" or mkvmerge_disponible())
+    if not con_mkv: print("MKVToolNix no disponible (o --sin-mkv): se omite la etapa de extracción.")
+    # La cache de nombres haría que las repeticiones no consulten al modelo simulado
+    motor.usar_cache_nombres = False
+    resultados = []
+    fallidos = 0
+    carpeta = tempfile.mkdtemp(prefix="weebnizador_bench_")
+    try:
+        for lineas in args.tamanos:
+            resultado = medir_tamano(lineas, args, carpeta, con_mkv)
+            resultados.append(resultado)
+            resumen = ", ".join(f"{etapa} {medida['mediana_s'] * 1000:.1f} ms" for etapa, medida in resultado["etapas"].items())
+            print(f"{lineas} líneas: {resumen}")
+            if resultado.get("fragmentos_un_archivo") == 0:
+                print(f"ERROR: la pista de {lineas} líneas no se repartió en tramos al procesarse como lote de un archivo.")
+                fallidos += 1
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    salida = {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "pysubs2": getattr(pysubs2, "VERSION", getattr(pysubs2, "__version__", "")),
+        "parametros": {clave: valor for clave, valor in vars(args).items() if clave not in ("salida", "comparar")},
+        "extraccion_medida": con_mkv,
+        "resultados": resultados,
+    }
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(salida, f, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {args.salida}")
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(salida, json.load(f))
+    return 1 if fallidos else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""Modo cola: varios procesos, en uno o varios equipos, reparten entre sí los MKV de carpetas compartidas.
+
+Cada trabajador recorre las carpetas y reclama un video creando `.<video>.mkv.weebnizador-lease` con
+O_CREAT|O_EXCL, que es atómico también sobre NFS y SMB. Mientras procesa, renueva la fecha de sus leases;
+si un trabajador se cae, su lease deja de renovarse, vence a los `segundos_lease` y otro trabajador
+retoma el video. Las salidas se guardan con un temporal y os.replace, y el manifiesto de cada carpeta
+se mezcla entre procesos (ver ManifiestoCarpeta), así que no importa qué equipo procesó cada episodio.
+
+    python Weebnizador.py --cola "//nas/anime"      # en cada equipo, tantas veces como se quiera
+"""
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import weebnizador_motor as motor
+
+SUFIJO_LEASE = ".weebnizador-lease"
+
+class TrabajadorCola:
+    def __init__(self, carpetas, mode='multi', workers=None, segundos_lease=600, segundos_estables=10, intervalo_sondeo=30,
+                 recursivo=False, seguir=False, al_log=print):
+        self.carpetas = [os.path.abspath(carpeta) for carpeta in carpetas]
+        self.mode = mode
+        self.segundos_lease = segundos_lease
+        self.segundos_estables = segundos_estables
+        self.intervalo_sondeo = intervalo_sondeo
+        self.recursivo = recursivo
+        self.seguir = seguir
+        self.al_log = al_log or motor._ignorar
+        self.motor = motor.MotorWeebnizador(mode, workers=workers, al_log=al_log)
+        self.motor.usar_diario = False
+        self.identidad = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._leases = {}     # ruta del MKV -> (ruta del lease, token)
+        self._procesados = {} # ruta -> (tamaño, mtime_ns) con los que la procesó este trabajador
+        self.resultados = {}  # ruta -> True/False del último proceso
+
+    def _listar_mkv(self):
+        for carpeta in self.carpetas:
+            if self.recursivo:
+                for raiz, _, nombres in os.walk(carpeta):
+                    for nombre in sorted(nombres):
+                        if nombre.lower().endswith('.mkv'): yield os.path.join(raiz, nombre)
+            else:
+                try: nombres = sorted(os.listdir(carpeta))
+                except OSError: continue
+                for nombre in nombres:
+                    if nombre.lower().endswith('.mkv'): yield os.path.join(carpeta, nombre)
+
+    def _ruta_lease(self, ruta):
+        return os.path.join(os.path.dirname(ruta), f".{os.path.basename(ruta)}{SUFIJO_LEASE}")
+
+    def _candidato(self, ruta):
+        """Un MKV que este trabajador no procesó ya, que no se está copiando y que otro no dejó al día."""
+        try: info = os.stat(ruta)
+        except OSError: return False
+        identidad = (info.st_size, info.st_mtime_ns)
+        if self._procesados.get(ruta) == identidad or time.time() - info.st_mtime < self.segundos_estables: return False
+        # Chequeo barato antes de reclamar; después de reclamar el motor lo vuelve a comprobar con el lease tomado
+        try: al_dia = self.motor.al_dia(ruta)
+        except OSError: al_dia = False
+        if al_dia: self._procesados[ruta] = identidad
+        return not al_dia
+
+    def reclamar(self, ruta):
+        """Intenta tomar el lease del video. Devuelve True si quedó a nombre de este trabajador."""
+        ruta_lease = self._ruta_lease(ruta)
+        token = uuid.uuid4().hex
+        for intento in range(2):
+            try:
+                descriptor = os.open(ruta_lease, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                if intento or not self._romper_si_vencido(ruta, ruta_lease): return False
+                continue
+            except OSError as e:
+                self.al_log(f"No se pudo crear el lease de {os.path.basename(ruta)}: {e}")
+                return False
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+                json.dump({"trabajador": self.identidad, "token": token, "fecha": time.time()}, f)
+            with self._lock: self._leases[ruta] = (ruta_lease, token)
+            if intento:
+                # El dueño anterior se cayó a mitad de camino: el .ass que haya quedado puede ser nuestro
+                manifiesto = self.motor._manifiesto(os.path.dirname(ruta))
+                if manifiesto: manifiesto.marcar_interrumpido(os.path.splitext(os.path.basename(ruta))[0])
+            return True
+        return False
+
+    def _leer_token(self, ruta_lease):
+        try:
+            with open(ruta_lease, encoding='utf-8') as f: return json.load(f).get("token")
+        except (OSError, ValueError, AttributeError): return None
+
+    def _romper_si_vencido(self, ruta, ruta_lease):
+        """Borra el lease si su dueño dejó de renovarlo. Devuelve True si se borró."""
+        try: info = os.stat(ruta_lease)
+        except FileNotFoundError: return True
+        if time.time() - info.st_mtime < self.segundos_lease: return False
+        token = self._leer_token(ruta_lease)
+        # Si dos trabajadores ven el mismo lease vencido, solo uno lo rompe; el otro vuelve a intentarlo en la próxima pasada
+        try:
+            with motor.bloqueo_archivo(ruta_lease + ".romper", caducidad_s=self.segundos_lease, espera_s=0):
+                try: info_actual = os.stat(ruta_lease)
+                except FileNotFoundError: return True
+                if info_actual.st_mtime_ns != info.st_mtime_ns or self._leer_token(ruta_lease) != token: return False
+                os.remove(ruta_lease)
+        except (TimeoutError, FileNotFoundError):
+            return False
+        self.al_log(f"El lease de {os.path.basename(ruta)} venció (trabajador caído); se retoma.")
+        return True
+
+    def liberar(self, ruta):
+        with self._lock: ruta_lease, token = self._leases.pop(ruta, (None, None))
+        if ruta_lease is None: return
+        # Solo se borra si sigue siendo nuestro (si tardamos más que el lease, otro pudo haberlo tomado)
+        if self._leer_token(ruta_lease) == token:
+            try: os.remove(ruta_lease)
+            except FileNotFoundError: pass
+
+    def _renovar_leases(self):
+        while not self._detener.wait(max(1, self.segundos_lease / 3)):
+            with self._lock: leases = list(self._leases.items())
+            for ruta, (ruta_lease, _) in leases:
+                try: os.utime(ruta_lease)
+                except OSError as e: self.al_log(f"No se pudo renovar el lease de {os.path.basename(ruta)}: {e}")
+
+    def _terminado(self, ruta, futuro):
+        try: exito = futuro.result()
+        except Exception as e:
+            self.al_log(f"Error procesando {ruta}: {e}"); exito = False
+        self.liberar(ruta)
+        self.resultados[ruta] = exito
+        try:
+            info = os.stat(ruta)
+            self._procesados[ruta] = (info.st_size, info.st_mtime_ns)
+        except OSError: pass
+
+    def _pasada(self, capacidad):
+        """Recorre las carpetas una vez reclamando y procesando lo que se pueda. Devuelve cuántos videos tomó."""
+        en_vuelo = {}
+        tomados = 0
+        for ruta in self._listar_mkv():
+            if self._detener.is_set(): break
+            if not self._candidato(ruta): continue
+            while len(en_vuelo) >= capacidad:
+                hechos, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                for futuro in hechos: self._terminado(en_vuelo.pop(futuro), futuro)
+            if not self.reclamar(ruta): continue
+            tomados += 1
+            self.al_log(f"[{self.identidad}] Reclamado: {ruta}")
+            en_vuelo[self.motor.enviar(ruta)] = ruta
+        for futuro in list(en_vuelo):
+            wait([futuro])
+            self._terminado(en_vuelo.pop(futuro), futuro)
+        return tomados
+
+    def ejecutar(self):
+        """Procesa hasta que no quede nada por reclamar (o, con seguir=True, hasta detener() o Ctrl+C)."""
+        self.al_log(f"Trabajador {self.identidad} en {', '.join(self.carpetas)} (modo {self.mode}, lease {self.segundos_lease} s).")
+        renovador = threading.Thread(target=self._renovar_leases, daemon=True)
+        renovador.start()
+        inicio = time.perf_counter()
+        try:
+            with self.motor:
+                capacidad = self.motor._num_workers()
+                while not self._detener.is_set():
+                    tomados = self._pasada(capacidad)
+                    if not self.seguir and not tomados: break
+                    if not tomados: self._detener.wait(self.intervalo_sondeo)
+        except KeyboardInterrupt:
+            self.al_log("Deteniendo el trabajador...")
+        finally:
+            self._detener.set()
+            for ruta in list(self._leases): self.liberar(ruta)
+            self.motor.duracion_lote = time.perf_counter() - inicio
+        return self.resultados
+
+    def detener(self):
+        self._detener.set()
@@ -0,0 +1,214 @@
+"""Interfaz gráfica (PyQt5) de Weebnizador. Toda la lógica está en weebnizador_motor."""
+import sys
+import threading
+from collections import deque
+from PyQt5 import QtWidgets, QtCore, QtGui
+
+import weebnizador_motor as motor
+
+# Veces por segundo que la ventana recoge los mensajes y el progreso de los hilos del motor
+fps_interfaz = 20
+# Mensajes en espera entre dos cuadros (si se llena se descartan los más viejos) y líneas que guarda el visor
+max_mensajes_pendientes = 10000
+max_lineas_registro = 5000
+# Copiar el registro a la consola y, opcionalmente, a un archivo (se agrega al final)
+imprimir_registro = True
+archivo_registro = None
+
+class BusEventos(QtCore.QObject):
+    """Junta los avisos de los hilos del motor y los entrega a la ventana `fps` veces por segundo.
+
+    Los hilos no emiten señales de Qt: agregan el mensaje a una cola acotada o pisan el último valor de
+    progreso, y un QTimer del hilo de la ventana lo vacía todo de una vez. Así el costo para la ventana
+    es el mismo con 2 archivos que con 500.
+    """
+    mensajes = QtCore.pyqtSignal(list)
+    estado = QtCore.pyqtSignal(dict) # solo lo que cambió desde el último cuadro: archivo, progreso_archivo, progreso_total
+
+    def __init__(self, fps=None, max_pendientes=None, archivo=None, imprimir=None, parent=None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._pendientes = deque(maxlen=max_pendientes or max_mensajes_pendientes)
+        self._omitidos = 0
+        self._estado = {}
+        self.archivo = archivo_registro if archivo is None else archivo
+        self.imprimir = imprimir_registro if imprimir is None else imprimir
+        self._sumidero = None
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(max(1, round(1000 / (fps or fps_interfaz))))
+        self._timer.timeout.connect(self.vaciar)
+
+    # Llamadas desde los hilos del motor
+    def log(self, mensaje):
+        with self._lock:
+            if len(self._pendientes) == self._pendientes.maxlen: self._omitidos += 1
+            self._pendientes.append(mensaje)
+
+    def progreso_archivo(self, valor):
+        with self._lock: self._estado['progreso_archivo'] = valor
+
+    def cambiar_archivo(self, texto, numero):
+        with self._lock: self._estado['archivo'] = (numero, texto); self._estado['progreso_archivo'] = 0
+
+    def progreso_total(self, valor):
+        with self._lock: self._estado['progreso_total'] = valor
+
+    # Hilo de la ventana
+    def iniciar(self):
+        self._timer.start()
+
+    def detener(self):
+        self._timer.stop()
+        self.vaciar()
+        if self._sumidero: self._sumidero.close(); self._sumidero = None
+
+    def vaciar(self):
+        with self._lock:
+            pendientes, omitidos, estado = list(self._pendientes), self._omitidos, self._estado
+            self._pendientes.clear(); self._omitidos = 0; self._estado = {}
+        if omitidos: pendientes.insert(0, f"({omitidos} mensajes descartados por exceso de registro)")
+        if pendientes:
+            texto = "\n".join(pendientes)
+            if self.imprimir: print(texto)
+            self._escribir(texto)
+            self.mensajes.emit(pendientes)
+        if estado: self.estado.emit(estado)
+
+    def _escribir(self, texto):
+        if not self.archivo: return
+        try:
+            if self._sumidero is None: self._sumidero = open(self.archivo, 'a', encoding='utf-8')
+            self._sumidero.write(texto + "\n"); self._sumidero.flush()
+        except OSError as e:
+            print(f"No se pudo escribir el registro en {self.archivo}, se continúa sin él: {e}")
+            self.archivo = None
+
+class VisorRegistro(QtWidgets.QPlainTextEdit):
+    """Registro de solo lectura que guarda las últimas `max_lineas` líneas (las viejas se descartan solas)."""
+    def __init__(self, max_lineas=None, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True); self.setMaximumBlockCount(max_lineas or max_lineas_registro)
+        self.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap); self.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+    def agregar(self, mensajes):
+        # Solo se sigue el final si el usuario no subió a leer algo anterior
+        barra = self.verticalScrollBar(); al_final = barra.value() == barra.maximum()
+        # De un lote más largo que el visor solo sobrevivirían las últimas líneas: las demás ni se agregan
+        self.appendPlainText("\n".join(mensajes[-self.maximumBlockCount():]))
+        if al_final: barra.setValue(barra.maximum())
+
+class ProcessingThread(QtCore.QThread):
+    processing_finished_signal = QtCore.pyqtSignal()
+    batch_summary = QtCore.pyqtSignal(str)
+
+    def __init__(self, files, mode, bus, parent=None, workers=None):
+        super().__init__(parent)
+        self.files = files
+        self.bus = bus
+        self.motor = motor.MotorWeebnizador(mode, workers=workers,
+                                            al_log=bus.log,
+                                            al_progreso_archivo=bus.progreso_archivo,
+                                            al_cambiar_archivo=lambda texto: bus.cambiar_archivo(texto, self.motor.current_file_num),
+                                            al_progreso_total=bus.progreso_total)
+
+    @property
+    def current_file_num(self):
+        return self.motor.current_file_num
+
+    def run(self):
+        self.motor.procesar_lote(self.files)
+        resumen = self.motor.resumen_lote()
+        for linea in resumen: self.bus.log(linea)
+        if resumen: self.batch_summary.emit("\n".join(resumen))
+        self.processing_finished_signal.emit()
+
+class DragAndDropWindow(QtWidgets.QWidget):
+    def __init__(self, mode):
+        super().__init__(); self.mode = mode; self.thread = None; self.bus = None
+        self.files_to_process_list = []; self.current_file_name_display = ""
+        self.current_file_num_display = 0; self.total_files_display = 0; self.batch_summary_text = ""
+        self.initUI()
+    def initUI(self):
+        self.setWindowTitle(f'Weebanizador - Modo: {"Multi-Sub" if self.mode == "multi" else "Extra-Sub"}')
+        self.setGeometry(100, 100, 450, 250) 
+        self.setStyleSheet("QWidget{background-color:#F0F0F0}QLabel#dropAreaLabel{border:2px dashed #4CAF50;border-radius:8px;padding:20px;color:#4CAF50;font-size:12px;min-height:60px;word-wrap:break-word}QLabel#dropAreaLabel:hover{border-color:#45a049;color:#45a049}QPushButton{background-color:#4CAF50;color:white;padding:8px 16px;border-radius:4px;font-size:14px;min-width:150px}QPushButton:hover{background-color:#45a049}QProgressBar{text-align:center}")
+        self.setAcceptDrops(True); main_layout = QtWidgets.QVBoxLayout()
+        self.drop_area = QtWidgets.QLabel(); self.drop_area.setObjectName("dropAreaLabel") 
+        self.drop_area.setAlignment(QtCore.Qt.AlignCenter); self.drop_area.setText('Suelta tus archivos .MKV aquí')
+        main_layout.addWidget(self.drop_area)
+        self.progress_bar = QtWidgets.QProgressBar(); self.progress_bar.setVisible(False)
+        main_layout.addWidget(self.progress_bar)
+        self.log_viewer = VisorRegistro(); self.log_viewer.setVisible(False); main_layout.addWidget(self.log_viewer)
+        button_layout = QtWidgets.QHBoxLayout(); self.log_button = QtWidgets.QPushButton('Ver registro')
+        self.log_button.setCheckable(True); self.log_button.toggled.connect(self.toggle_log_viewer); button_layout.addWidget(self.log_button)
+        self.cancel_button = QtWidgets.QPushButton('Cerrar')
+        self.cancel_button.clicked.connect(self.close); button_layout.addWidget(self.cancel_button)
+        main_layout.addLayout(button_layout); self.setLayout(main_layout)
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls(): self.drop_area.setStyleSheet("border:2px dashed #45a049;border-radius:8px;padding:20px;color:#45a049;font-size:12px"); event.acceptProposedAction()
+        else: event.ignore()
+    def dragLeaveEvent(self, event): self.drop_area.setStyleSheet("border:2px dashed #4CAF50;border-radius:8px;padding:20px;color:#4CAF50;font-size:12px")
+    def dropEvent(self, event):
+        self.drop_area.setStyleSheet("border:2px dashed #4CAF50;border-radius:8px;padding:20px;color:#4CAF50;font-size:12px")
+        mimeData = event.mimeData()
+        if mimeData.hasUrls():
+            self.files_to_process_list = [url.toLocalFile() for url in mimeData.urls() if url.toLocalFile().lower().endswith('.mkv')]
+            if self.files_to_process_list:
+                self.total_files_display=len(self.files_to_process_list);self.progress_bar.setValue(0);self.progress_bar.setVisible(True)
+                self.drop_area.setText(f"Iniciando lote de {self.total_files_display} archivo(s)...");self.setAcceptDrops(False);self.cancel_button.setEnabled(False)
+                self.bus=BusEventos(parent=self);self.bus.mensajes.connect(self.log_batch_received);self.bus.estado.connect(self.state_received)
+                self.thread=ProcessingThread(self.files_to_process_list,self.mode,self.bus)
+                self.thread.batch_summary.connect(self.batch_summary_received)
+                self.thread.processing_finished_signal.connect(self.on_batch_processing_finished)
+                self.thread.finished.connect(self.thread.deleteLater);self.bus.iniciar();self.thread.start()
+            else: QtWidgets.QMessageBox.warning(self,'Error','No se seleccionaron archivos .MKV válidos.');self.drop_area.setText('Suelta tus archivos .MKV aquí')
+        event.acceptProposedAction()
+    def update_overall_progress(self,value): self.progress_bar.setValue(value)
+    def update_current_file_progress_in_label(self,progress_value):
+        base_text = f"Archivo {self.current_file_num_display}/{self.total_files_display}: Procesando: {self.current_file_name_display}"
+        self.drop_area.setText(f"{base_text} ({progress_value}%)")
+    def state_received(self,state):
+        # Un cuadro: solo el último archivo y el último porcentaje, la etiqueta se arma una vez
+        if 'progreso_total' in state: self.update_overall_progress(state['progreso_total'])
+        if 'archivo' in state:
+            file_num,filename_message=state['archivo']
+            self.current_file_name_display=filename_message.split(":",1)[1].strip() if ":" in filename_message else "desconocido";self.current_file_num_display=file_num
+        if 'archivo' in state or 'progreso_archivo' in state: self.update_current_file_progress_in_label(state.get('progreso_archivo',0))
+    def log_batch_received(self,messages): self.log_viewer.agregar(messages)
+    def toggle_log_viewer(self,visible):
+        self.log_viewer.setVisible(visible);self.log_button.setText('Ocultar registro' if visible else 'Ver registro')
+        self.resize(self.width(),self.sizeHint().height() if visible else 250)
+    def batch_summary_received(self,summary): self.batch_summary_text = summary
+    def on_batch_processing_finished(self):
+        if self.bus: self.bus.detener() # entrega lo que haya quedado pendiente antes del resumen
+        text = f"¡Lote completado! ({self.total_files_display} archivo(s) procesados)"
+        if self.batch_summary_text: text += "\n\n" + self.batch_summary_text
+        self.drop_area.setText(text);self.progress_bar.setValue(100)
+        self.setAcceptDrops(True);self.cancel_button.setEnabled(True);self.bus=None
+        # Con resumen se deja la ventana abierta más tiempo para poder leerlo; con el registro abierto no se cierra sola
+        if not self.log_button.isChecked(): QtCore.QTimer.singleShot(15000 if self.batch_summary_text else 3000,self.close)
+
+class MainWindow(QtWidgets.QMainWindow):
+    def __init__(self): super().__init__(); self.drag_window_instance = None; self.initUI()
+    def initUI(self):
+        self.setWindowTitle('Weebanizador'); self.setGeometry(100,100,400,200)
+        self.setStyleSheet("QMainWindow{background-color:#F0F0F0}QPushButton{background-color:#4CAF50;color:white;padding:8px 16px;border-radius:4px;font-size:14px;min-width:150px}QPushButton:hover{background-color:#45a049}")
+        central_widget=QtWidgets.QWidget();self.setCentralWidget(central_widget)
+        layout=QtWidgets.QVBoxLayout();layout.setContentsMargins(20,20,20,20);layout.setSpacing(15)
+        multi_subs_button=QtWidgets.QPushButton('Modo Multi-Sub');multi_subs_button.clicked.connect(lambda:self.open_drag_drop_window('multi'))
+        layout.addWidget(multi_subs_button)
+        extra_sub_button=QtWidgets.QPushButton('Modo Extra-Sub');extra_sub_button.clicked.connect(lambda:self.open_drag_drop_window('extra'))
+        layout.addWidget(extra_sub_button)
+        central_widget.setLayout(layout);self.setMinimumSize(400,200)
+    def open_drag_drop_window(self,mode):
+        if self.drag_window_instance is None or not self.drag_window_instance.isVisible():
+            self.drag_window_instance=DragAndDropWindow(mode);self.drag_window_instance.show()
+        else:self.drag_window_instance.activateWindow()
+
+def main():
+    if not motor.gemini_configurado():
+        print("ADVERTENCIA: API Key de Gemini no configurada. La inversión de Nombre-Apellido será omitida.")
+        print("Edita weebnizador_motor.py y reemplaza 'TU_API_KEY_DE_GEMINI_AQUI', o define la variable de entorno GEMINI_API_KEY.")
+    app = QtWidgets.QApplication(sys.argv)
+    main_window = MainWindow()
+    main_window.show()
+    return app.exec_()
@@ -0,0 +1,163 @@
+"""Lectura y escritura directa de subtítulos ASS/SRT, sin pasar por los objetos de pysubs2.
+
+Solo se guardan el inicio y el texto de cada evento (Dialogue/Comment en ASS). Al guardar, el archivo
+original se copia tal cual y únicamente se reescriben las líneas cuyo texto cambió, así los estilos,
+las fuentes incrustadas y los miles de eventos de karaoke o carteles no se reconstruyen ni se reserializan.
+Los eventos y sus tiempos se leen igual que pysubs2, para que la reescritura dé el mismo texto.
+"""
+import io
+import os
+import re
+
+from pysubs2.formats import autodetect_format
+from pysubs2.time import TIMESTAMP, TIMESTAMP_SHORT, timestamp_to_ms
+
+# Igual que pysubs2: hasta 3 caracteres antes del corchete (BOM) y al menos una minúscula dentro
+SECCION = re.compile(r"^.{,3}\[[^]]*[a-z][^]]*]")
+CAMPOS_EVENTO = 10 # Layer/Marked, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+
+class EventoDirecto:
+    """Evento con lo mínimo que usa el motor: inicio en ms, texto y la línea del archivo de la que salió."""
+    __slots__ = ("start", "_texto", "numero_linea", "modificado")
+
+    def __init__(self, start, texto, numero_linea):
+        self.start = start
+        self._texto = texto
+        self.numero_linea = numero_linea
+        self.modificado = False
+
+    @property
+    def text(self):
+        return self._texto
+
+    @text.setter
+    def text(self, valor):
+        if valor != self._texto:
+            self._texto = valor
+            self.modificado = True
+
+def _tiempo_a_ms(valor):
+    valor = valor.strip()
+    signo = 1
+    if valor.startswith("-"): valor = valor[1:]; signo = -1
+    coincidencia = TIMESTAMP.match(valor) or TIMESTAMP_SHORT.match(valor)
+    if coincidencia is None: raise ValueError(f"Failed to parse timestamp: {valor!r}")
+    return signo * timestamp_to_ms(coincidencia.groups())
+
+def _dividir_evento_ass(linea):
+    """Devuelve (inicio_ms, texto, posición del texto en la línea cruda o None) de una línea Dialogue/Comment."""
+    campos = linea.strip().split(":", 1)[1].strip().split(",", CAMPOS_EVENTO - 1)
+    inicio = _tiempo_a_ms(campos[1]) if len(campos) > 1 else 0
+    if len(campos) < CAMPOS_EVENTO: return inicio, "", None
+    texto = campos[-1]
+    return inicio, texto, len(linea.rstrip()) - len(texto)
+
+class SubtituloDirecto:
+    """Lista de EventoDirecto con save() y to_string() que conservan el resto del archivo byte por byte.
+
+    La fuente es el texto ya cargado (pistas extraídas a memoria) o la ruta del archivo; con una ruta
+    no se retiene el contenido, se vuelve a leer al guardar, así la memoria depende de la cantidad de
+    eventos y no del tamaño de los adjuntos.
+    """
+    def __init__(self, eventos, formato, texto=None, ruta=None):
+        self.eventos = eventos
+        self.formato = formato
+        self._texto = texto
+        self._ruta = ruta
+
+    def __iter__(self):
+        return iter(self.eventos)
+
+    def __len__(self):
+        return len(self.eventos)
+
+    def __getitem__(self, idx):
+        return self.eventos[idx]
+
+    def _lineas_fuente(self):
+        if self._texto is not None:
+            yield from io.StringIO(self._texto)
+        else:
+            with open(self._ruta, 'rb') as f:
+                for linea in f: yield linea.decode('utf-8')
+
+    def _escribir(self, destino):
+        if self.formato not in ('ass', 'ssa'): raise ValueError("Solo los subtítulos ASS/SSA se pueden reescribir directamente")
+        modificados = {evento.numero_linea: evento for evento in self.eventos if evento.modificado}
+        for numero_linea, linea in enumerate(self._lineas_fuente()):
+            evento = modificados.get(numero_linea)
+            if evento is not None:
+                _, _, posicion = _dividir_evento_ass(linea)
+                if posicion is not None:
+                    linea = linea[:posicion] + evento.text + linea[len(linea.rstrip()):]
+            destino.write(linea)
+
+    def to_string(self, format_='ass'):
+        salida = io.StringIO()
+        self._escribir(salida)
+        return salida.getvalue()
+
+    def save(self, ruta, format_=None):
+        # format_ se acepta por compatibilidad con pysubs2; solo se escribe el formato original (ASS/SSA)
+        temporal = ruta + ".tmp"
+        with open(temporal, 'w', encoding='utf-8', newline='') as f:
+            self._escribir(f)
+        os.replace(temporal, ruta)
+
+def _leer_ass(lineas):
+    eventos = []
+    seccion_ignorada = False
+    for numero_linea, linea in enumerate(lineas):
+        limpia = linea.strip()
+        if SECCION.match(limpia):
+            seccion_ignorada = any(nombre in limpia for nombre in ("Info", "Aegisub", "Fonts", "Graphics"))
+        elif not seccion_ignorada and (limpia.startswith("Dialogue:") or limpia.startswith("Comment:")):
+            inicio, texto, _ = _dividir_evento_ass(linea)
+            eventos.append(EventoDirecto(inicio, texto, numero_linea))
+    return eventos
+
+def _texto_srt(lineas):
+    # Misma limpieza que pysubs2 para SRT: etiquetas HTML básicas a etiquetas ASS y saltos a \N
+    if len(lineas) >= 2 and all(re.match(r"\s*$", linea) for linea in lineas[:-1]) and re.match(r"\s*\d+\s*$", lineas[-1]):
+        return ""
+    texto = re.sub(r"\n+ *\d+ *$", "", "".join(lineas).strip())
+    for etiqueta in "isub":
+        texto = re.sub(rf"< *{etiqueta} *>", rf"{{\\{etiqueta}1}}", texto)
+        texto = re.sub(rf"< */ *{etiqueta} *>", rf"{{\\{etiqueta}0}}", texto)
+    texto = re.sub(r"< */? *[a-zA-Z][^>]*>", "", texto)
+    return re.sub(r"\n", r"\\N", texto)
+
+def _leer_srt(lineas):
+    eventos, textos = [], []
+    for numero_linea, linea in enumerate(lineas):
+        tiempos = TIMESTAMP.findall(linea)
+        if len(tiempos) == 2:
+            eventos.append(EventoDirecto(timestamp_to_ms(tiempos[0]), "", numero_linea))
+            textos.append([])
+        elif eventos:
+            textos[-1].append(linea)
+    for evento, lineas_texto in zip(eventos, textos):
+        evento._texto = _texto_srt(lineas_texto)
+    return eventos
+
+def leer_subtitulo(texto=None, ruta=None, para_guardar=False):
+    """Lee un ASS/SSA (o un SRT de solo lectura) desde texto o ruta.
+
+    Devuelve None si el formato no es uno de esos, o si es SRT y hay que guardarlo (un SRT se guarda
+    como .ass, así que no hay bytes que copiar); en esos casos conviene usar pysubs2.
+    """
+    if texto is None:
+        with open(ruta, encoding='utf-8', newline='') as f: fragmento = f.read(10000)
+    else:
+        fragmento = texto[:10000]
+    try: formato = autodetect_format(fragmento)
+    except Exception: return None
+    if formato not in ('ass', 'ssa', 'srt') or (formato == 'srt' and para_guardar): return None
+    lector = _leer_srt if formato == 'srt' else _leer_ass
+    if texto is not None:
+        eventos = lector(io.StringIO(texto))
+    else:
+        with open(ruta, 'rb') as f:
+            # pysubs2 abre los archivos con saltos universales; el texto de un SRT conserva los saltos internos
+            eventos = lector(linea.decode('utf-8').replace("\r\n", "\n") for linea in f)
+    return SubtituloDirecto(eventos, formato, texto=texto, ruta=ruta)
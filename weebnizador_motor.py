@@ -0,0 +1,1863 @@
+"""Motor de Weebnizador sin interfaz gráfica.
+
+Contiene toda la lógica de procesamiento (extracción de pistas, honoríficos, inversión de nombres)
+y se puede importar desde scripts, cron o pruebas sin cargar PyQt5. La librería de Gemini solo se
+importa la primera vez que se consulta la API.
+"""
+import os
+import mmap
+import subprocess
+import pysubs2
+import re
+import json
+import hashlib
+import sqlite3
+import time
+import random
+import shutil
+import tempfile
+import threading
+from collections import deque, namedtuple
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+import weebnizador_lector
+import weebnizador_matroska
+import weebnizador_nombres
+
+# --- CONFIGURACIÓN DE API DE GEMINI ---
+# ADVERTENCIA: Guardar tu API Key directamente en el código no es seguro para scripts compartidos o en producción.
+# Considera usar variables de entorno o un archivo de configuración para mayor seguridad si distribuyes este script.
+# Para obtener una API Key, visita: https://aistudio.google.com/app/apikey
+# También se puede definir con la variable de entorno GEMINI_API_KEY (útil en servidores y tareas programadas).
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "TU_API_KEY_DE_GEMINI_AQUI") # <-- ¡REEMPLAZA ESTO CON TU API KEY REAL!
+GEMINI_MODELO = 'gemini-1.5-flash'
+# Otro servidor compatible con la API REST de Gemini (p. ej. uno falso local para pruebas). None = el de Google.
+gemini_endpoint = os.environ.get("GEMINI_ENDPOINT") or None
+# Consultas a la vez en todo el proceso, pares Nombre Apellido por consulta (las listas largas se parten en
+# consultas paralelas), reintentos con espera creciente, segundos por intento y plazo total por consulta.
+gemini_max_concurrentes = 4
+gemini_nombres_por_lote = 150
+gemini_reintentos = 3
+gemini_timeout_s = 60
+gemini_plazo_total_s = 180
+
+# Lista de honoríficos comunes en japonés
+honorificos = ["-san", "-chan", "-kun", "-sama", "-sensei", "-senpai", "-nee", "-nii", "-dono"]
+
+# Combinaciones redundantes en español
+palabras_redundantes = ["la señorita", "el señorito", "señorita", "señorito", "señor", "señora", "La señorita", "El señorito"]
+
+mkvextract_path = r"C:\Program Files\MKVToolNix\mkvextract.exe"
+mkvmerge_path = r"C:\Program Files\MKVToolNix\mkvmerge.exe"
+
+# Carpeta donde mkvextract deja las pistas antes de leerlas a memoria. None = carpeta temporal del sistema.
+# Conviene que sea un disco local para no escribir temporales en la carpeta del video (p. ej. un NAS).
+directorio_temporal = None
+
+# Archivos que se procesan a la vez. Identificación, extracción y Gemini corren en hilos y la reescritura
+# de subtítulos en un pool de procesos. None = un trabajador por núcleo; 1 = procesar en serie como antes.
+num_trabajadores = None
+
+# Cache en disco de mkvmerge --identify y de las pistas elegidas. None = carpeta de cache del usuario.
+directorio_cache = None
+usar_cache_identify = True
+cache_identify_max_entradas = 5000
+# Además de ruta, tamaño y fecha, comparar un hash del inicio y final del archivo (más seguro, algo más lento)
+cache_identify_hash_parcial = False
+# Recordar por carpeta (serie) qué pares Nombre Apellido invirtió o descartó Gemini, para no volver a preguntarlos
+usar_cache_nombres = True
+# Días que se recuerda un par descartado (NULL); pasado ese plazo se vuelve a preguntar. None = sin vencimiento
+dias_vigencia_descartes_nombres = 30
+# Decidir sin Gemini los pares evidentes (nombre y apellido japoneses conocidos, o palabras del español);
+# solo los dudosos se consultan a la API (ver weebnizador_nombres.py)
+usar_clasificador_nombres = True
+# Leer y guardar los ASS sin pysubs2: solo se reescriben las líneas de diálogo que cambian y el resto del
+# archivo (estilos, fuentes incrustadas, carteles) se copia tal cual. Mucho más rápido en releases con
+# mucho typesetting, pero la salida conserva el formato original en vez del que genera pysubs2.
+usar_lectura_directa = False
+# Cómo se elige la línea en español de cada línea con honoríficos. 'local': la mejor dentro de ±5 s, línea por
+# línea. 'global': una sola alineación monótona por archivo (las líneas no se cruzan en el tiempo), que evita
+# mandar varias líneas fuente a la misma línea en español dejando sin tocar a sus vecinas.
+alineacion_honorificos = 'local'
+# Estimar primero el desfase del español respecto de la fuente (uno global y uno por tramo de
+# `desfase_tramo_segundos`, correlacionando los inicios de línea) y buscar cada línea en ±`rango_con_desfase_segundos`
+# alrededor de su tiempo corrido, en lugar de ±5 s alrededor del original. Sirve para subtítulos externos
+# sincronizados con otra versión del video (otra intro, otro corte). Con numpy la correlación se hace por FFT.
+estimar_desfase = False
+desfase_maximo_segundos = 300
+desfase_tramo_segundos = 120
+rango_con_desfase_segundos = 2
+# En modo Multi-Sub, generar además <base>.<idioma>.ass (por ejemplo <base>.es-ES.ass) para cada otra pista en
+# español del MKV; la mejor sigue yendo a <base>.ass. Se identifica, extrae y recorre la fuente una sola vez.
+todas_las_variantes_espanol = False
+# Cómo se leen las pistas del MKV. 'mkvtoolnix': mkvmerge --identify y mkvextract. 'nativo': weebnizador_matroska,
+# que lee en Python solo los bloques de subtítulos sin abrir procesos (no necesita MKVToolNix instalado); si
+# un archivo usa algo que no entiende (cifrado, compresión LZO, lacing...) ese archivo se lee con MKVToolNix.
+motor_extraccion = 'mkvtoolnix'
+# Pistas muy largas (compilados de temporada, cajas de películas): con más de 2 × `lineas_por_fragmento` líneas
+# en la fuente, la búsqueda de honoríficos y la inversión de nombres se reparten en tramos de tiempo entre los
+# procesos del pool. Los tramos se cortan donde ninguna ventana de búsqueda cruza el corte, así que el resultado
+# es idéntico al de una sola pasada. None o 0 = siempre en una pasada.
+lineas_por_fragmento = 4000
+# Guardar en cada carpeta un manifiesto con lo ya procesado para saltar los videos que no cambiaron
+usar_manifiesto = True
+# Archivo .jsonl donde se agrega una línea por MKV con el tiempo de cada etapa y los contadores. None = no escribir traza.
+archivo_traza = None
+# Mediciones que se guardan en memoria para el resumen; el modo vigilante y la cola con --seguir nunca cierran
+# un lote, así que solo se conservan las últimas
+mediciones_max_en_memoria = 5000
+
+# Subtítulo ya cargado en memoria (nombre solo para los mensajes, texto con el contenido completo)
+SubtituloEnMemoria = namedtuple("SubtituloEnMemoria", ["nombre", "texto"])
+
+def cargar_subtitulo(fuente, directa=False, para_guardar=False):
+    """Carga un subtítulo desde una ruta o desde un SubtituloEnMemoria.
+
+    Con directa=True se usa weebnizador_lector cuando el formato lo permite (si no, pysubs2).
+    """
+    en_memoria = isinstance(fuente, SubtituloEnMemoria)
+    if directa:
+        subs = weebnizador_lector.leer_subtitulo(texto=fuente.texto if en_memoria else None, ruta=None if en_memoria else fuente, para_guardar=para_guardar)
+        if subs is not None: return subs
+    if en_memoria:
+        return pysubs2.SSAFile.from_string(fuente.texto)
+    return pysubs2.load(fuente)
+
+def nombre_subtitulo(fuente):
+    return fuente.nombre if isinstance(fuente, SubtituloEnMemoria) else os.path.basename(fuente)
+
+# Prioridad de variantes por idioma al elegir la mejor pista de subtítulos de cada idioma
+LANGUAGE_PRIORITY = {
+    'spa': {
+        'latam': {'title': ['latin_america', 'latam', 'cr_spanish(latin_america)'], 'lang': ['latin america', 'spanish (latin america)'], 'score': 3},
+        'es': {'title': ['español', 'spanish'], 'lang': ['español', 'spanish'], 'score': 2},
+        'default': {'score': 1}
+    },
+    'eng': {
+        'default': {'score': 1}
+    },
+    'may': { 
+        'default': {'title': ['cr_malay', 'malay'], 'lang': ['may', 'malay', 'bahasa melayu'], 'score': 1}
+    }
+}
+
+def get_language_score(track):
+    if 'properties' not in track: return 0
+    lang = track['properties'].get('language', '').lower()
+    title = track['properties'].get('track_name', '').lower()
+    # Intenta hacer coincidir con 'may' usando language_ietf si 'language' es 'und' o genérico.
+    base_lang_prop = track['properties'].get('language_ietf', '').lower() if track['properties'].get('language_ietf', '').lower() in LANGUAGE_PRIORITY else lang
+    base_lang = next((k for k in LANGUAGE_PRIORITY if k in base_lang_prop), None) 
+    
+    if not base_lang: return 0
+    # Si base_lang es 'may', prioriza las claves específicas de 'may' en LANGUAGE_PRIORITY
+    if base_lang == 'may':
+        variant_data = LANGUAGE_PRIORITY['may'].get('default', {}) # Asumiendo que 'may' solo tiene 'default' por ahora
+        if 'title' in variant_data and any(pattern in title for pattern in variant_data['title']): return variant_data['score']
+        if 'lang' in variant_data and any(pattern in lang for pattern in variant_data['lang']): return variant_data['score']
+        return variant_data.get('score',0)
+
+    # Lógica original para otros idiomas
+    for variant, criteria in LANGUAGE_PRIORITY[base_lang].items():
+        if variant == 'default': continue
+        if 'title' in criteria and any(pattern in title for pattern in criteria['title']): return criteria['score']
+        if 'lang' in criteria and any(pattern in lang for pattern in criteria['lang']): return criteria['score']
+    return LANGUAGE_PRIORITY[base_lang]['default']['score']
+
+def elegir_mejores_pistas(json_output):
+    """Devuelve ({idioma: pista o None}, {idioma: puntaje}) a partir de la salida de mkvmerge --identify -J."""
+    best_subtitles = {'spa': None, 'eng': None, 'may': None}
+    best_scores = {'spa': 0, 'eng': 0, 'may': 0}
+
+    for track in json_output['tracks']:
+        if track['type'] == 'subtitles':
+            score = get_language_score(track)
+            assigned_lang_key = asignar_idioma_pista(track)
+            if assigned_lang_key and score > best_scores.get(assigned_lang_key, -1): # Usar .get con default para evitar KeyError
+                best_subtitles[assigned_lang_key] = track
+                best_scores[assigned_lang_key] = score
+    return best_subtitles, best_scores
+
+def variantes_espanol(json_output, pista_principal):
+    """Devuelve {etiqueta: pista} con las demás pistas de texto en español, para generar <base>.<etiqueta>.ass.
+
+    La etiqueta es el language_ietf de la pista (es-419, es-ES...) o su language; si se repite, se le agrega el ID.
+    """
+    def etiqueta_de(track):
+        propiedades = track.get('properties', {})
+        return re.sub(r"[^A-Za-z0-9-]", "", propiedades.get('language_ietf') or propiedades.get('language') or "") or "spa"
+    usadas = {etiqueta_de(pista_principal)} if pista_principal else set()
+    variantes = {}
+    for track in json_output['tracks']:
+        if track['type'] != 'subtitles' or 'properties' not in track or asignar_idioma_pista(track) != 'spa': continue
+        if pista_principal is not None and track['id'] == pista_principal['id']: continue
+        # Las pistas de imagen (PGS, VobSub) no se pueden weebificar
+        if not track['properties'].get('codec_id', 'S_TEXT').startswith('S_TEXT'): continue
+        etiqueta = etiqueta_de(track)
+        if etiqueta in usadas: etiqueta = f"{etiqueta}-{track['id']}"
+        usadas.add(etiqueta)
+        variantes[etiqueta] = track
+    return variantes
+
+def asignar_idioma_pista(track):
+    """Determina a qué idioma base pertenece la pista para actualizar best_subtitles."""
+    lang_prop_track = track['properties'].get('language', '').lower()
+    ietf_lang_prop_track = track['properties'].get('language_ietf', '').lower()
+    
+    assigned_lang_key = None
+    if 'may' in ietf_lang_prop_track or ('may' in lang_prop_track and not ietf_lang_prop_track): # Prioridad a IETF para 'may'
+        assigned_lang_key = 'may'
+    elif 'eng' in lang_prop_track or 'eng' in ietf_lang_prop_track :
+         assigned_lang_key = 'eng'
+    elif 'spa' in lang_prop_track or 'spa' in ietf_lang_prop_track:
+         assigned_lang_key = 'spa'
+    # Add more specific language checks if needed before falling back to just 'in'
+    else: # Fallback general (podría ser menos preciso)
+        for key_lang_priority in LANGUAGE_PRIORITY.keys():
+            if key_lang_priority in lang_prop_track or key_lang_priority in ietf_lang_prop_track:
+                assigned_lang_key = key_lang_priority
+                break
+    return assigned_lang_key
+
+def directorio_cache_usuario():
+    if directorio_cache: return directorio_cache
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'Weebnizador')
+
+def ruta_base_datos_cache():
+    return os.path.join(directorio_cache_usuario(), 'cache.sqlite3')
+
+def firma_prioridad_idiomas():
+    # Cambia cuando se edita LANGUAGE_PRIORITY, lo que invalida las pistas elegidas guardadas
+    return hashlib.sha1(json.dumps(LANGUAGE_PRIORITY, sort_keys=True).encode('utf-8')).hexdigest()
+
+def hash_parcial_archivo(ruta, tamano_bloque=1 << 16):
+    h = hashlib.sha1()
+    with open(ruta, 'rb') as f:
+        h.update(f.read(tamano_bloque))
+        tamano = os.fstat(f.fileno()).st_size
+        if tamano > tamano_bloque:
+            f.seek(max(tamano_bloque, tamano - tamano_bloque))
+            h.update(f.read(tamano_bloque))
+    return h.hexdigest()
+
+class CacheIdentificacion:
+    """Cache persistente de mkvmerge --identify y de las pistas elegidas por idioma.
+
+    La clave es la ruta del MKV y se valida con tamaño, fecha de modificación y, opcionalmente,
+    un hash parcial del contenido. Las pistas elegidas solo se reutilizan si LANGUAGE_PRIORITY no
+    cambió desde que se guardaron; si cambió, se vuelven a puntuar sobre el JSON guardado.
+    Cuando hay más de max_entradas se descartan las usadas hace más tiempo.
+    """
+    def __init__(self, ruta_db, max_entradas=5000, hash_parcial=False):
+        os.makedirs(os.path.dirname(ruta_db), exist_ok=True)
+        self.max_entradas = max_entradas
+        self.hash_parcial = hash_parcial
+        self.lock = threading.Lock()
+        self.conexion = sqlite3.connect(ruta_db, check_same_thread=False)
+        self.conexion.execute("""CREATE TABLE IF NOT EXISTS identificaciones (
+            ruta TEXT PRIMARY KEY, tamano INTEGER, mtime_ns INTEGER, hash_parcial TEXT,
+            identify TEXT, firma_prioridad TEXT, pistas TEXT, usado REAL)""")
+        self.conexion.commit()
+
+    def _identidad(self, mkv_file):
+        info = os.stat(mkv_file)
+        return os.path.abspath(mkv_file), info.st_size, info.st_mtime_ns, (hash_parcial_archivo(mkv_file) if self.hash_parcial else '')
+
+    def obtener(self, mkv_file):
+        """Devuelve (json_output, pistas) o None. pistas es {idioma: [id, puntaje]} o None si hay que volver a puntuar."""
+        ruta, tamano, mtime_ns, hash_parcial = self._identidad(mkv_file)
+        with self.lock:
+            fila = self.conexion.execute("SELECT tamano, mtime_ns, hash_parcial, identify, firma_prioridad, pistas FROM identificaciones WHERE ruta = ?", (ruta,)).fetchone()
+            if fila is None or tuple(fila[:3]) != (tamano, mtime_ns, hash_parcial): return None
+            self.conexion.execute("UPDATE identificaciones SET usado = ? WHERE ruta = ?", (time.time(), ruta))
+            self.conexion.commit()
+        pistas = json.loads(fila[5]) if fila[4] == firma_prioridad_idiomas() and fila[5] else None
+        return json.loads(fila[3]), pistas
+
+    def guardar(self, mkv_file, json_output, pistas):
+        ruta, tamano, mtime_ns, hash_parcial = self._identidad(mkv_file)
+        with self.lock:
+            self.conexion.execute("INSERT OR REPLACE INTO identificaciones VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                  (ruta, tamano, mtime_ns, hash_parcial, json.dumps(json_output), firma_prioridad_idiomas(), json.dumps(pistas), time.time()))
+            self.conexion.execute("""DELETE FROM identificaciones WHERE ruta IN (
+                SELECT ruta FROM identificaciones ORDER BY usado DESC LIMIT -1 OFFSET ?)""", (self.max_entradas,))
+            self.conexion.commit()
+
+    def invalidar(self):
+        with self.lock:
+            self.conexion.execute("DELETE FROM identificaciones")
+            self.conexion.commit()
+
+_cache_identificacion = None
+_lock_caches = threading.Lock()
+
+def obtener_cache_identificacion():
+    """Devuelve la cache compartida del proceso, o None si está desactivada o no se pudo abrir."""
+    global _cache_identificacion, usar_cache_identify
+    if not usar_cache_identify: return None
+    with _lock_caches:
+        if _cache_identificacion is None:
+            try:
+                _cache_identificacion = CacheIdentificacion(ruta_base_datos_cache(), cache_identify_max_entradas, cache_identify_hash_parcial)
+            except (OSError, sqlite3.Error) as e:
+                print(f"No se pudo abrir la cache de identificación, se continuará sin ella: {e}")
+                usar_cache_identify = False
+                return None
+    return _cache_identificacion
+
+class CacheNombres:
+    """Decisiones de inversión de nombres ya tomadas, guardadas por ámbito (la carpeta de la serie).
+
+    Cada par 'Nombre Apellido' se guarda con su forma invertida si Gemini lo aceptó como nombre,
+    o con NULL si lo descartó. Así solo los pares nunca vistos en esa carpeta se envían a la API.
+    Los descartes vencen a los `vigencia_descartes_s` segundos o al cambiar VERSION_REGLAS_NOMBRES.
+    """
+    def __init__(self, ruta_db, vigencia_descartes_s=None):
+        self.vigencia_descartes_s = vigencia_descartes_s
+        os.makedirs(os.path.dirname(ruta_db), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conexion = sqlite3.connect(ruta_db, check_same_thread=False)
+        self.conexion.execute("""CREATE TABLE IF NOT EXISTS nombres (
+            ambito TEXT, nombre TEXT, invertido TEXT, decidido REAL, PRIMARY KEY (ambito, nombre))""")
+        columnas = {fila[1] for fila in self.conexion.execute("PRAGMA table_info(nombres)")}
+        if "version" not in columnas: self.conexion.execute("ALTER TABLE nombres ADD COLUMN version INTEGER")
+        self.conexion.commit()
+
+    def consultar(self, ambito, nombres):
+        """Devuelve {nombre: invertido o None} para los nombres ya decididos en el ámbito.
+
+        Los descartes vencidos o de otra versión de las reglas no se devuelven, así se vuelven a consultar.
+        """
+        decididos = {}
+        nombres = list(nombres)
+        limite = time.time() - self.vigencia_descartes_s if self.vigencia_descartes_s is not None else float('-inf')
+        with self.lock:
+            for inicio in range(0, len(nombres), 500):
+                lote = nombres[inicio:inicio + 500]
+                filas = self.conexion.execute(f"SELECT nombre, invertido, decidido, version FROM nombres WHERE ambito = ? AND nombre IN ({','.join('?' * len(lote))})", [ambito] + lote)
+                for nombre, invertido, decidido, version in filas:
+                    if invertido is None and (version != VERSION_REGLAS_NOMBRES or decidido < limite): continue
+                    decididos[nombre] = invertido
+        return decididos
+
+    def guardar(self, ambito, decisiones):
+        ahora = time.time()
+        with self.lock:
+            self.conexion.executemany("INSERT OR REPLACE INTO nombres (ambito, nombre, invertido, decidido, version) VALUES (?, ?, ?, ?, ?)",
+                                      [(ambito, nombre, invertido, ahora, VERSION_REGLAS_NOMBRES) for nombre, invertido in decisiones.items()])
+            self.conexion.commit()
+
+    def olvidar(self, ambito=None):
+        with self.lock:
+            if ambito is None: self.conexion.execute("DELETE FROM nombres")
+            else: self.conexion.execute("DELETE FROM nombres WHERE ambito = ?", (ambito,))
+            self.conexion.commit()
+
+_cache_nombres = None
+# Subir cuando cambie el prompt o la lectura de respuestas de Gemini, para que los descartes viejos se vuelvan a consultar
+VERSION_REGLAS_NOMBRES = 2
+
+_clasificador_nombres = None
+
+def obtener_clasificador_nombres():
+    global _clasificador_nombres
+    if _clasificador_nombres is None: _clasificador_nombres = weebnizador_nombres.ClasificadorNombres()
+    return _clasificador_nombres
+
+def obtener_cache_nombres():
+    """Devuelve la cache de nombres compartida del proceso, o None si está desactivada o no se pudo abrir."""
+    global _cache_nombres, usar_cache_nombres
+    if not usar_cache_nombres: return None
+    with _lock_caches:
+        if _cache_nombres is None:
+            try:
+                vigencia = dias_vigencia_descartes_nombres * 86400 if dias_vigencia_descartes_nombres is not None else None
+                _cache_nombres = CacheNombres(ruta_base_datos_cache(), vigencia_descartes_s=vigencia)
+            except (OSError, sqlite3.Error) as e:
+                print(f"No se pudo abrir la cache de nombres, se continuará sin ella: {e}")
+                usar_cache_nombres = False
+                return None
+    return _cache_nombres
+
+# Archivos de control que se dejan en cada carpeta procesada
+NOMBRE_MANIFIESTO = ".weebnizador_manifiesto.json"
+NOMBRE_DIARIO = ".weebnizador_diario.jsonl"
+# Subir cuando cambie la forma de reescribir los subtítulos, para que los manifiestos viejos no salten videos
+VERSION_REGLAS = 1
+
+def hash_archivo(ruta):
+    h = hashlib.sha1()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''): h.update(bloque)
+    return h.hexdigest()
+
+@contextmanager
+def bloqueo_archivo(ruta, caducidad_s=60, espera_s=30):
+    """Bloqueo entre procesos (y equipos, sobre una carpeta compartida) con un archivo creado con O_EXCL.
+
+    Un bloqueo más viejo que caducidad_s se considera abandonado por un proceso caído y se borra.
+    Si no se consigue en espera_s segundos lanza TimeoutError.
+    """
+    limite = time.monotonic() + espera_s
+    pausa = 0.01
+    while True:
+        try:
+            os.close(os.open(ruta, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(ruta).st_mtime > caducidad_s: os.remove(ruta); continue
+            except FileNotFoundError: continue
+            if time.monotonic() > limite: raise TimeoutError(f"No se pudo tomar el bloqueo {ruta}")
+            time.sleep(pausa); pausa = min(pausa * 2, 0.5)
+    try: yield
+    finally:
+        try: os.remove(ruta)
+        except FileNotFoundError: pass
+
+class ManifiestoCarpeta:
+    """Manifiesto y diario de una carpeta de videos.
+
+    El manifiesto guarda, por video, la huella de las entradas con las que se generó el .ass (identidad
+    del MKV, subtítulo externo, reglas y configuración) y el hash del .ass resultante. Con eso se saltan
+    los videos que no cambiaron y se reconoce nuestro propio .ass en la siguiente pasada. El diario anota
+    el inicio y el fin de cada video; si un lote se corta, lo que quedó iniciado se retoma en la próxima.
+
+    Varios procesos pueden compartir la carpeta: el manifiesto se relee cuando cambia en disco y cada
+    registro se mezcla con lo que haya escrito otro proceso, bajo un archivo de bloqueo. Con
+    con_diario=False (modo cola, donde los leases cumplen esa función) el diario no se escribe.
+    """
+    def __init__(self, directorio, con_diario=True):
+        self.ruta = os.path.join(directorio, NOMBRE_MANIFIESTO)
+        self.ruta_diario = os.path.join(directorio, NOMBRE_DIARIO)
+        self.con_diario = con_diario
+        self.lock = threading.Lock()
+        self.entradas = {}
+        self._firma = None
+        self._recargar()
+        self.interrumpidos = self._leer_diario() if con_diario else set()
+        self._abiertos = set()
+
+    def _recargar(self):
+        # La firma (tamaño, mtime) evita releer el JSON si nadie lo tocó
+        try: info = os.stat(self.ruta)
+        except OSError: return
+        firma = (info.st_size, info.st_mtime_ns)
+        if firma == self._firma: return
+        try:
+            with open(self.ruta, encoding='utf-8') as f: datos = json.load(f)
+            if datos.get("version") == 1: self.entradas = datos.get("archivos", {})
+            self._firma = firma
+        except (OSError, ValueError, AttributeError): pass
+
+    def _leer_diario(self):
+        abiertos = set()
+        try:
+            with open(self.ruta_diario, encoding='utf-8') as f:
+                for linea in f:
+                    try: evento = json.loads(linea)
+                    except ValueError: continue # La última línea puede haber quedado a medias
+                    if evento.get("evento") == "inicio": abiertos.add(evento.get("archivo"))
+                    else: abiertos.discard(evento.get("archivo"))
+        except OSError: pass
+        return abiertos
+
+    def obtener(self, nombre):
+        with self.lock:
+            self._recargar()
+            return self.entradas.get(nombre)
+
+    def marcar_interrumpido(self, nombre):
+        """Para quien sabe por otro medio (un lease vencido) que el proceso anterior del video se cortó."""
+        with self.lock: self.interrumpidos.add(nombre)
+
+    def anotar(self, nombre, evento):
+        """Agrega 'inicio' o 'fin' al diario. Cuando no queda nada abierto, el diario se borra."""
+        with self.lock:
+            if evento == "inicio": self._abiertos.add(nombre)
+            else:
+                self._abiertos.discard(nombre)
+                self.interrumpidos.discard(nombre)
+            if not self.con_diario: return
+            if not self._abiertos and not self.interrumpidos:
+                try: os.remove(self.ruta_diario)
+                except FileNotFoundError: pass
+                return
+            with open(self.ruta_diario, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({"archivo": nombre, "evento": evento, "fecha": time.time()}, ensure_ascii=False) + "\n")
+
+    def registrar(self, nombre, entrada):
+        with self.lock, bloqueo_archivo(self.ruta + ".lock"):
+            self._recargar()
+            self.entradas[nombre] = entrada
+            temporal = self.ruta + ".tmp"
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump({"version": 1, "archivos": self.entradas}, f, ensure_ascii=False, indent=1)
+            os.replace(temporal, self.ruta) # Reemplazo atómico: un corte no deja el manifiesto a medias
+            info = os.stat(self.ruta)
+            self._firma = (info.st_size, info.st_mtime_ns)
+
+def guardar_subtitulo(subs, ruta):
+    """Guarda con un temporal y os.replace, así nadie (otro equipo de la cola, un reproductor) ve un .ass a medias."""
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        subs.save(temporal, format_=os.path.splitext(ruta)[1][1:].lower())
+        os.replace(temporal, ruta)
+    except BaseException:
+        try: os.remove(temporal)
+        except OSError: pass
+        raise
+
+# Palabras de una línea de texto (se usan para puntuar coincidencias entre la fuente y el español)
+patron_palabras = re.compile(r"\b[A-Za-zÀ-ÖØ-öø-ÿ]+\b")
+
+class IndiceLineasEspanol:
+    """Índice de las líneas en español ordenado por tiempo de inicio.
+
+    Permite buscar la mejor línea para una línea fuente revisando solo las que caen dentro
+    de la ventana de tiempo, en lugar de recorrer todo el subtítulo por cada línea fuente.
+    """
+    def __init__(self, subs_espanol):
+        self.lineas = list(subs_espanol)
+        self.orden = sorted(range(len(self.lineas)), key=lambda idx: self.lineas[idx].start)
+        self.inicios = [self.lineas[idx].start for idx in self.orden]
+        self.palabras = [set(patron_palabras.findall(linea.text)) for linea in self.lineas]
+
+    def actualizar(self, idx):
+        # Debe llamarse cuando cambia el texto de una línea para que las búsquedas siguientes lo vean
+        self.palabras[idx] = set(patron_palabras.findall(self.lineas[idx].text))
+
+    def buscar(self, inicio_fuente, palabras_fuente, rango_ms):
+        """Devuelve el índice de la línea con mejor puntaje dentro de ±rango_ms, o None."""
+        izquierda = bisect_left(self.inicios, inicio_fuente - rango_ms)
+        derecha = bisect_right(self.inicios, inicio_fuente + rango_ms)
+        mejor_idx = None; mejor_puntaje = 0
+        # Se recorren en el orden original del archivo para conservar el mismo desempate que el recorrido completo
+        for idx in sorted(self.orden[izquierda:derecha]):
+            linea_esp = self.lineas[idx]
+            puntaje = 1.0 / (abs(linea_esp.start - inicio_fuente) + 1)
+            # El conjunto de palabras es un atajo; la comparación real es por subcadena sobre el texto
+            if not self.palabras[idx].isdisjoint(palabras_fuente) or any(nombre in linea_esp.text for nombre in palabras_fuente):
+                puntaje += 1.0
+            if puntaje > mejor_puntaje: mejor_idx = idx; mejor_puntaje = puntaje
+        return mejor_idx
+
+def _ventanas_tiempo(inicios_espanol, inicios_fuente, rango_ms):
+    """Para cada inicio fuente, el rango [izquierda, derecha) de líneas en español dentro de ±rango_ms."""
+    try:
+        import numpy
+    except ImportError:
+        return [(bisect_left(inicios_espanol, inicio - rango_ms), bisect_right(inicios_espanol, inicio + rango_ms)) for inicio in inicios_fuente]
+    espanol = numpy.asarray(inicios_espanol, dtype=numpy.int64)
+    fuente = numpy.asarray(inicios_fuente, dtype=numpy.int64)
+    izquierdas = numpy.searchsorted(espanol, fuente - rango_ms, side='left')
+    derechas = numpy.searchsorted(espanol, fuente + rango_ms, side='right')
+    return list(zip(izquierdas.tolist(), derechas.tolist()))
+
+def alinear_monotono(inicios_fuente, palabras_fuente, indice_espanol, rango_ms):
+    """Alinea las líneas fuente con las líneas en español sin cruces en el tiempo.
+
+    Cada línea fuente va a una línea en español dentro de ±rango_ms (o a ninguna) y, en orden de tiempo,
+    los destinos siempre avanzan: dos líneas fuente nunca comparten la misma línea en español. Se maximiza la suma del mismo puntaje que usa la búsqueda local
+    (cercanía en el tiempo + 1 si comparten palabras). Devuelve una lista con el índice en español de
+    cada línea fuente, o None si quedó sin pareja.
+    """
+    lineas = indice_espanol.lineas
+    orden_fuente = sorted(range(len(inicios_fuente)), key=inicios_fuente.__getitem__)
+    ventanas = _ventanas_tiempo(indice_espanol.inicios, [inicios_fuente[k] for k in orden_fuente], rango_ms)
+    # mejores[posición] = (valor, nodo) de la mejor cadena que termina en esa línea en español (por orden de tiempo).
+    # Las ventanas solo avanzan, así que todo lo que queda a la izquierda se resume en un único máximo.
+    mejores = [(0.0, -1)] * len(lineas)
+    maximo_cerrado = (0.0, -1); frontera = 0
+    nodos = [] # (línea fuente, índice en español, nodo anterior)
+    for k, (izquierda, derecha) in zip(orden_fuente, ventanas):
+        while frontera < izquierda:
+            if mejores[frontera] > maximo_cerrado: maximo_cerrado = mejores[frontera]
+            frontera += 1
+        inicio, palabras = inicios_fuente[k], palabras_fuente[k]
+        previo = maximo_cerrado
+        candidatos = []
+        for posicion in range(izquierda, derecha):
+            idx = indice_espanol.orden[posicion]
+            linea_esp = lineas[idx]
+            puntaje = 1.0 / (abs(linea_esp.start - inicio) + 1)
+            if not indice_espanol.palabras[idx].isdisjoint(palabras) or any(nombre in linea_esp.text for nombre in palabras):
+                puntaje += 1.0
+            candidatos.append((posicion, previo[0] + puntaje, idx, previo[1]))
+            # La cadena que termina en esta posición cuenta recién para las siguientes: el anterior queda
+            # estrictamente a la izquierda y cada línea en español recibe a lo sumo una línea fuente
+            if mejores[posicion] > previo: previo = mejores[posicion]
+        # Se guardan después de recorrer la ventana, así una línea fuente aporta a lo sumo una pareja a la cadena
+        for posicion, valor, idx, nodo_previo in candidatos:
+            nodos.append((k, idx, nodo_previo))
+            if (valor, len(nodos) - 1) > mejores[posicion]: mejores[posicion] = (valor, len(nodos) - 1)
+    destinos = [None] * len(inicios_fuente)
+    _, nodo = max([maximo_cerrado] + mejores[frontera:])
+    while nodo >= 0:
+        k, idx, nodo = nodos[nodo]
+        destinos[k] = idx
+    return destinos
+
+def _correlacion_suavizada(cajas_fuente, cajas_espanol, lag_min, lag_max, suavizado):
+    """Para cada desfase de lag_min a lag_max cajas, cuántos pares (fuente, español) quedan a esa distancia
+    ±`suavizado` cajas. Devuelve (desfase del máximo, valor del máximo, promedio de todos).
+
+    Es la correlación cruzada de los dos histogramas de inicios; con numpy se calcula por FFT y sin él
+    contando los pares, con el mismo resultado. A igualdad gana el desfase más chico.
+    """
+    try:
+        import numpy
+    except ImportError:
+        conteos = [0] * (lag_max - lag_min + 1)
+        for caja in cajas_fuente:
+            for otra in cajas_espanol[bisect_left(cajas_espanol, caja + lag_min):bisect_right(cajas_espanol, caja + lag_max)]:
+                conteos[otra - caja - lag_min] += 1
+        acumulados = [0] * (len(conteos) + 1)
+        for posicion, conteo in enumerate(conteos): acumulados[posicion + 1] = acumulados[posicion] + conteo
+        suavizados = [acumulados[min(len(conteos), posicion + suavizado + 1)] - acumulados[max(0, posicion - suavizado)] for posicion in range(len(conteos))]
+        pico = max(range(len(suavizados)), key=lambda posicion: (suavizados[posicion], -abs(posicion + lag_min)))
+        return pico + lag_min, suavizados[pico], sum(suavizados) / len(suavizados)
+    base = min(cajas_fuente[0], cajas_espanol[0])
+    fuente = numpy.bincount(numpy.asarray(cajas_fuente, dtype=numpy.int64) - base)
+    espanol = numpy.bincount(numpy.asarray(cajas_espanol, dtype=numpy.int64) - base)
+    # Largo suficiente para que la correlación circular no se pise con ningún desfase posible
+    n = 1 << (len(fuente) + len(espanol) + abs(lag_min) + abs(lag_max)).bit_length()
+    correlacion = numpy.fft.irfft(numpy.fft.rfft(espanol, n) * numpy.conj(numpy.fft.rfft(fuente, n)), n)
+    desfases = numpy.arange(lag_min, lag_max + 1)
+    conteos = numpy.rint(correlacion[desfases % n]).astype(numpy.int64)
+    acumulados = numpy.concatenate(([0], numpy.cumsum(conteos)))
+    posiciones = numpy.arange(len(conteos))
+    suavizados = acumulados[numpy.minimum(len(conteos), posiciones + suavizado + 1)] - acumulados[numpy.maximum(0, posiciones - suavizado)]
+    maximo = suavizados.max()
+    empatados = desfases[suavizados == maximo]
+    return int(empatados[numpy.argmin(numpy.abs(empatados))]), int(maximo), float(suavizados.mean())
+
+def _pico_desfase(cajas_fuente, cajas_espanol, lag_min, lag_max, proporcion=0.4, suavizado=2, minimo_lineas=8):
+    """Desfase (en cajas) con más pares a ±`suavizado` cajas, o None si el pico no se distingue del resto.
+
+    Se suma en una ventana porque los tiempos de dos fansubs nunca coinciden exacto y el pico se reparte
+    entre cajas vecinas.
+    """
+    if len(cajas_fuente) < minimo_lineas or len(cajas_espanol) < minimo_lineas: return None
+    desfase, pico, promedio = _correlacion_suavizada(cajas_fuente, cajas_espanol, lag_min, lag_max, suavizado)
+    # El pico tiene que juntar por encima del fondo una buena parte de las líneas; con dos subtítulos sin
+    # relación el máximo de miles de desfases posibles apenas sobresale del promedio
+    if pico - promedio < max(minimo_lineas, proporcion * min(len(cajas_fuente), len(cajas_espanol))) or pico < 2.5 * promedio: return None
+    return desfase
+
+def estimar_desfases(inicios_fuente, inicios_espanol, desfase_maximo_ms=300_000, tramo_ms=120_000, ancho_ms=100):
+    """Estima cuánto hay que sumarle a un tiempo de la fuente para llegar al español.
+
+    Primero un desfase global y después uno por cada tramo de `tramo_ms` de la fuente, buscado en el mismo
+    margen alrededor del global (una intro más larga corre solo lo que viene después). Los tramos sin
+    señal clara usan el global. Devuelve [(inicio_tramo_ms, desfase_ms)] ordenado por tiempo, o [] si
+    ni siquiera el global se pudo estimar.
+    """
+    cajas_fuente = sorted(inicio // ancho_ms for inicio in inicios_fuente)
+    cajas_espanol = sorted(inicio // ancho_ms for inicio in inicios_espanol)
+    margen = max(1, desfase_maximo_ms // ancho_ms)
+    # Con un corte a mitad de episodio el desfase global solo reúne una parte de las líneas, por eso se le pide menos
+    desfase_global = _pico_desfase(cajas_fuente, cajas_espanol, -margen, margen, proporcion=0.2)
+    if desfase_global is None: return []
+    cajas_tramo = max(1, tramo_ms // ancho_ms)
+    tramos = []
+    for inicio_tramo in range(cajas_fuente[0] - cajas_fuente[0] % cajas_tramo, cajas_fuente[-1] + 1, cajas_tramo):
+        fuente_tramo = cajas_fuente[bisect_left(cajas_fuente, inicio_tramo):bisect_left(cajas_fuente, inicio_tramo + cajas_tramo)]
+        lag_min, lag_max = desfase_global - margen, desfase_global + margen
+        espanol_tramo = cajas_espanol[bisect_left(cajas_espanol, inicio_tramo + lag_min):bisect_right(cajas_espanol, inicio_tramo + cajas_tramo + lag_max)]
+        desfase = _pico_desfase(fuente_tramo, espanol_tramo, lag_min, lag_max) if fuente_tramo and espanol_tramo else None
+        # Lo que no se aleja del global (o del tramo anterior) más que el ruido de los tiempos se toma igual que ese
+        if desfase is None or abs(desfase - desfase_global) <= 2: desfase = desfase_global
+        elif tramos and abs(desfase * ancho_ms - tramos[-1][1]) <= 2 * ancho_ms: continue
+        desfase *= ancho_ms
+        if not tramos or tramos[-1][1] != desfase: tramos.append((inicio_tramo * ancho_ms, desfase))
+    return tramos
+
+def desfase_en(tramos, inicio):
+    # El primer tramo también cubre lo anterior a su inicio
+    return tramos[max(0, bisect_right(tramos, (inicio, float('inf'))) - 1)][1]
+
+class ReglasHonorificos:
+    """Reglas de honoríficos compiladas una sola vez por proceso.
+
+    Cada método reproduce exactamente el resultado de aplicar las expresiones regulares
+    una por una, pero antes hace una búsqueda combinada para descartar rápido las líneas
+    en las que no hay nada que hacer (que son la gran mayoría).
+    """
+    def __init__(self, honorificos_lista, palabras_redundantes_lista):
+        self.honorificos = list(honorificos_lista)
+        alternativas = "|".join(re.escape(h) for h in sorted(self.honorificos, key=len, reverse=True))
+        self.patron_detectar = re.compile(rf"\b[A-Za-zÀ-ÖØ-öø-ÿ]+(?:{alternativas})\b", re.IGNORECASE)
+        # Prefiltros para el archivo completo: cuentan cada honorífico pegado a una letra sin separar en líneas.
+        # La versión en bytes toma cualquier byte no ASCII como letra, así que nunca cuenta menos que patron_detectar
+        # (puede contar de más, por ejemplo en los estilos); una pista con 0 coincidencias no tiene honoríficos.
+        self.prefiltro_texto = re.compile(rf"(?<=[A-Za-zÀ-ÖØ-öø-ÿ])(?:{alternativas})(?!\w)", re.IGNORECASE)
+        self.prefiltro_bytes = re.compile(rf"(?<=[A-Za-z\x80-\xff])(?:{alternativas})(?![A-Za-z0-9_])".encode(), re.IGNORECASE)
+        self.patron_presentes = re.compile(alternativas, re.IGNORECASE)
+        self.patrones_captura = {h: re.compile(rf"([A-Za-zÀ-ÖØ-öø-ÿ]+){re.escape(h)}(?:[!?\\.]*)", re.IGNORECASE) for h in self.honorificos}
+
+        self.redundantes_unicas = sorted({palabra.lower() for palabra in palabras_redundantes_lista}, key=len, reverse=True)
+        self.patrones_redundantes = [re.compile(rf"(?i)\b{re.escape(palabra)}\b\s*") for palabra in self.redundantes_unicas]
+        self.patron_alguna_redundante = re.compile(rf"(?i)\b(?:{'|'.join(re.escape(p) for p in self.redundantes_unicas)})\b")
+
+        self.patron_espacios = re.compile(r"\s{2,}")
+        self.patrones_duplicados = [(h, re.compile(rf"({re.escape(h)}){{2,}}")) for h in self.honorificos]
+        self.patron_algun_duplicado = re.compile(rf"({alternativas})\1")
+
+    def tiene_honorificos(self, texto):
+        return self.patron_detectar.search(texto) is not None
+
+    def capturar(self, texto):
+        """Devuelve [(nombre, nombre_con_honorifico, honorifico)] en el orden de la lista de honoríficos."""
+        presentes = {m.group(0).lower() for m in self.patron_presentes.finditer(texto)}
+        if not presentes: return []
+        processed_names = set(); encontrados = []
+        for honorifico_item in self.honorificos:
+            if honorifico_item.lower() not in presentes: continue
+            for nombre_sin_honorifico in self.patrones_captura[honorifico_item].findall(texto):
+                if nombre_sin_honorifico.lower() not in processed_names:
+                    encontrados.append((nombre_sin_honorifico, f"{nombre_sin_honorifico}{honorifico_item}", honorifico_item))
+                    processed_names.add(nombre_sin_honorifico.lower())
+        return encontrados
+
+    def quitar_redundantes(self, texto):
+        if not self.patron_alguna_redundante.search(texto): return texto
+        for patron in self.patrones_redundantes:
+            texto = patron.sub("", texto)
+        return texto
+
+    def colapsar_duplicados(self, texto):
+        if not self.patron_algun_duplicado.search(texto): return texto
+        for honorifico_item, patron in self.patrones_duplicados:
+            while patron.search(texto): texto = patron.sub(honorifico_item, texto)
+        return texto
+
+    def aplicar(self, texto_espanol, encontrados):
+        """Inserta los honoríficos encontrados en la línea en español y limpia el resultado."""
+        texto = self.quitar_redundantes(texto_espanol)
+        for nombre_sin_honorifico, nombre_con_honorifico, honorifico_val in encontrados:
+            patron_existente, patron_insercion = _patrones_insercion(nombre_sin_honorifico, honorifico_val)
+            if not patron_existente.search(texto):
+                texto = patron_insercion.sub(nombre_con_honorifico, texto, count=1)
+        return self.colapsar_duplicados(self.patron_espacios.sub(" ", texto).strip())
+
+@lru_cache(maxsize=4096)
+def _patrones_insercion(nombre_sin_honorifico, honorifico_val):
+    # Los nombres se repiten mucho a lo largo de una temporada, así que se cachean sus patrones
+    return (re.compile(rf"(?i)\b{re.escape(nombre_sin_honorifico)}{re.escape(honorifico_val)}\b"),
+            re.compile(rf"(?i)\b{re.escape(nombre_sin_honorifico)}\b(?!\W*{re.escape(honorifico_val)})"))
+
+_reglas_honorificos = None
+
+def obtener_reglas_honorificos():
+    """Devuelve las reglas compiladas compartidas por todo el proceso."""
+    global _reglas_honorificos
+    if _reglas_honorificos is None:
+        _reglas_honorificos = ReglasHonorificos(honorificos, palabras_redundantes)
+    return _reglas_honorificos
+
+# Eventos ASS (Dialogue/Comment) o tiempos de SRT, para calcular la densidad de honoríficos de una pista
+patron_eventos_texto = re.compile(r"^[ \t]*(?:Dialogue|Comment):|-->", re.MULTILINE)
+patron_eventos_bytes = re.compile(patron_eventos_texto.pattern.encode(), re.MULTILINE)
+
+def _contar_coincidencias(patron, datos):
+    return sum(1 for _ in patron.finditer(datos))
+
+def puntuar_honorificos(fuente):
+    """Devuelve (honoríficos, eventos) de una pista contando sobre el contenido crudo, sin parsearla.
+
+    Las rutas se recorren con mmap, así que una pista sin honoríficos cuesta una sola pasada por sus bytes.
+    """
+    reglas = obtener_reglas_honorificos()
+    if isinstance(fuente, SubtituloEnMemoria):
+        return _contar_coincidencias(reglas.prefiltro_texto, fuente.texto), _contar_coincidencias(patron_eventos_texto, fuente.texto)
+    with open(fuente, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0: return 0, 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+            return _contar_coincidencias(reglas.prefiltro_bytes, datos), _contar_coincidencias(patron_eventos_bytes, datos)
+
+def contar_eventos(fuente):
+    """Cantidad de eventos de una pista contada sobre el contenido crudo, sin parsearla."""
+    if isinstance(fuente, SubtituloEnMemoria): return _contar_coincidencias(patron_eventos_texto, fuente.texto)
+    with open(fuente, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0: return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+            return _contar_coincidencias(patron_eventos_bytes, datos)
+
+def eliminar_creditos(subs):
+    creditos_patron = re.compile(r"(Traducción|Edición|Control de calidad).*", re.IGNORECASE)
+    for linea in subs:
+        if creditos_patron.search(linea.text):
+            linea.text = ""
+    return subs
+
+def weebificar_subtitulos(sub_ingles, sub_espanol, sub_malayo, rango_segundos=5, contadores=None, lectura_directa=None, alineacion=None, desfase=None, ejecutor=None, fragmentos=1):
+    """Parte de CPU del proceso: elige la fuente de honoríficos, limpia créditos e inserta los honoríficos.
+
+    No usa Qt ni la red, así que puede ejecutarse en otro proceso. Devuelve (subs_espanol, mensajes);
+    subs_espanol es None si no se pudo cargar el subtítulo en español. Si se pasa un diccionario en
+    `contadores`, se suman ahí las líneas revisadas y las líneas a las que se agregaron honoríficos.
+    lectura_directa=None, alineacion=None y desfase=None usan usar_lectura_directa, alineacion_honorificos y estimar_desfase.
+    Con un `ejecutor` (pool de procesos) y fragmentos > 1 la búsqueda local se reparte en hasta `fragmentos` tramos.
+    """
+    resultados, mensajes = weebificar_variantes(sub_ingles, [sub_espanol], sub_malayo, rango_segundos, contadores, lectura_directa, alineacion, desfase, ejecutor, fragmentos)
+    return resultados[0], mensajes
+
+def weebificar_variantes(sub_ingles, subs_espanol_lista, sub_malayo, rango_segundos=5, contadores=None, lectura_directa=None, alineacion=None, desfase=None, ejecutor=None, fragmentos=1):
+    """Como weebificar_subtitulos, pero para varias pistas en español a la vez (por ejemplo es-419 y es-ES).
+
+    La fuente de honoríficos se elige, se carga y se recorre una sola vez para todas. Devuelve
+    ([subs_espanol o None por cada entrada], mensajes).
+    """
+    mensajes = []; log = mensajes.append
+    contadores = {} if contadores is None else contadores
+    directa = usar_lectura_directa if lectura_directa is None else lectura_directa
+    alineacion = alineacion or alineacion_honorificos
+    desfase = estimar_desfase if desfase is None else desfase
+    reglas = obtener_reglas_honorificos()
+    subs_fuente_honorificos = None
+    fuente_usada = None
+    source_lang_name = ""
+
+    # Se puntúan las candidatas sobre el texto crudo y solo se parsea la de mayor densidad (a igualdad, el inglés)
+    candidatas = []
+    for orden, (fuente, nombre_idioma) in enumerate(((sub_ingles, "Inglés"), (sub_malayo, "Malayo"))):
+        if not fuente: continue
+        try: coincidencias, eventos = puntuar_honorificos(fuente)
+        except (OSError, ValueError) as e:
+            log(f"Error leyendo subtítulos en {nombre_idioma} desde {nombre_subtitulo(fuente)}: {e}.")
+            continue
+        if coincidencias: candidatas.append((-coincidencias / max(eventos, 1), orden, fuente, nombre_idioma))
+        else: log(f"Subtítulos en {nombre_idioma} encontrados, pero no contienen honoríficos.")
+
+    for _, _, fuente, nombre_idioma in sorted(candidatas, key=lambda candidata: candidata[:2]):
+        try:
+            subs_candidato = cargar_subtitulo(fuente, directa)
+        except Exception as e:
+            log(f"Error cargando subtítulos en {nombre_idioma} desde {nombre_subtitulo(fuente)}: {e}.")
+            continue
+        # El prefiltro puede contar honoríficos fuera de los diálogos (estilos, comentarios); se confirma en las líneas
+        if any(reglas.tiene_honorificos(linea.text) for linea in subs_candidato):
+            subs_fuente_honorificos = subs_candidato
+            fuente_usada = fuente
+            source_lang_name = nombre_idioma
+            log(f"Usando subtítulos en {nombre_idioma} como fuente de honoríficos.")
+            break
+        log(f"Subtítulos en {nombre_idioma} encontrados, pero no contienen honoríficos.")
+
+    pendientes = []
+    if subs_fuente_honorificos:
+        for linea_fuente in subs_fuente_honorificos:
+            found_honorifics_in_line = reglas.capturar(linea_fuente.text)
+            if found_honorifics_in_line:
+                pendientes.append((linea_fuente, found_honorifics_in_line, set(patron_palabras.findall(linea_fuente.text))))
+        contadores["lineas_fuente"] = contadores.get("lineas_fuente", 0) + len(subs_fuente_honorificos)
+
+    resultados = []
+    for sub_espanol in subs_espanol_lista:
+        if sub_espanol is None:
+            log("No se proporcionó subtítulo en Español. No se puede continuar.")
+            resultados.append(None); continue
+        try:
+            subs_espanol = cargar_subtitulo(sub_espanol, directa, para_guardar=True)
+        except Exception as e:
+            log(f"Error crítico al cargar el subtítulo en Español desde {nombre_subtitulo(sub_espanol)}: {e}")
+            resultados.append(None); continue
+
+        subs_espanol = eliminar_creditos(subs_espanol)
+        contadores["lineas_espanol"] = contadores.get("lineas_espanol", 0) + len(subs_espanol)
+        if subs_fuente_honorificos:
+            log(f"Procesando honoríficos usando: {nombre_subtitulo(fuente_usada)} ({source_lang_name})")
+            rango_ms, desfases = rango_segundos * 1000, None
+            if desfase:
+                tramos = estimar_desfases([linea.start for linea in subs_fuente_honorificos if linea.text], [linea.start for linea in subs_espanol if linea.text],
+                                          int(desfase_maximo_segundos * 1000), int(desfase_tramo_segundos * 1000))
+                if tramos:
+                    desfases = [desfase_en(tramos, linea.start) for linea, _, _ in pendientes]
+                    rango_ms = int(rango_con_desfase_segundos * 1000)
+                    log("Desfase estimado del español: " + ", ".join(f"{inicio // 60000}:{inicio // 1000 % 60:02d} {corrimiento / 1000:+.1f} s" for inicio, corrimiento in tramos))
+                    contadores["tramos_desfase"] = contadores.get("tramos_desfase", 0) + len(tramos)
+                else: log(f"No se pudo estimar el desfase del español; se busca en ±{rango_segundos} s.")
+            lineas_con_honorificos = _insertar_honorificos(subs_espanol, pendientes, reglas, rango_ms, alineacion, desfases, ejecutor, fragmentos)
+            contadores["lineas_con_honorificos"] = contadores.get("lineas_con_honorificos", 0) + lineas_con_honorificos
+        else:
+            log("No hay fuente de honoríficos (Inglés/Malayo) disponible. Solo se limpiarán créditos.")
+        resultados.append(subs_espanol)
+    return resultados, mensajes
+
+def _insertar_honorificos(subs_espanol, pendientes, reglas, rango_ms, alineacion, desfases=None, ejecutor=None, fragmentos=1):
+    """Inserta en subs_espanol los honoríficos de las líneas fuente pendientes. Devuelve cuántas líneas cambiaron.
+
+    `desfases` (uno por pendiente, en ms) corre el tiempo de cada línea fuente antes de buscarla en el español.
+    """
+    inicios = [linea.start for linea, _, _ in pendientes]
+    if desfases: inicios = [inicio + corrimiento for inicio, corrimiento in zip(inicios, desfases)]
+    capturas = [(encontrados, palabras) for _, encontrados, palabras in pendientes]
+    # La alineación global no se reparte: su desempate depende de la cadena completa
+    if ejecutor is not None and fragmentos > 1 and alineacion != 'global':
+        ordenados = sorted(inicios)
+        cortes = sorted({ordenados[len(ordenados) * parte // fragmentos] for parte in range(1, fragmentos)})
+        if cortes: return _insertar_en_fragmentos(subs_espanol, inicios, capturas, reglas, rango_ms, cortes, ejecutor)
+    return _insertar_en_serie(subs_espanol, inicios, capturas, reglas, rango_ms, alineacion)
+
+def _insertar_en_fragmentos(subs_espanol, inicios, capturas, reglas, rango_ms, cortes, ejecutor):
+    """Reparte la búsqueda local en tramos de tiempo y junta el resultado, idéntico al de _insertar_en_serie.
+
+    Cada tramo se lleva sus líneas fuente y las líneas en español a las que llegan sus ventanas (el tramo
+    más `rango_ms` de cada lado) y decide por su cuenta. Después se repasan las decisiones en el orden
+    original: una decisión vale si en su ventana cada línea tiene el mismo texto que vio su tramo; si otro
+    tramo ya tocó alguna de esas líneas (en los bordes), esa línea fuente se vuelve a buscar aquí.
+    """
+    lineas = list(subs_espanol)
+    originales = [linea.text for linea in lineas]
+    orden = sorted(range(len(lineas)), key=lambda idx: lineas[idx].start)
+    inicios_espanol = [lineas[idx].start for idx in orden]
+    limites = [None] + cortes + [None]
+    tramos = [bisect_right(cortes, inicio) for inicio in inicios]
+    # Cada tramo conserva el orden original de sus líneas fuente
+    propias = [[] for _ in range(len(cortes) + 1)]
+    for posicion, tramo in enumerate(tramos): propias[tramo].append(posicion)
+    trabajos = []
+    for (desde, hasta), posiciones in zip(zip(limites, limites[1:]), propias):
+        izquierda = 0 if desde is None else bisect_left(inicios_espanol, desde - rango_ms)
+        derecha = len(orden) if hasta is None else bisect_right(inicios_espanol, hasta + rango_ms)
+        espanol = [(idx, lineas[idx].start, originales[idx]) for idx in sorted(orden[izquierda:derecha])]
+        trabajos.append(ejecutor.submit(_insertar_fragmento, espanol, [inicios[posicion] for posicion in posiciones], [capturas[posicion] for posicion in posiciones], rango_ms))
+    decisiones = [iter(trabajo.result()) for trabajo in trabajos]
+
+    vistas = [{} for _ in trabajos] # lo que cada tramo escribió hasta ahora: índice -> texto
+    distintas = [set() for _ in trabajos] # líneas cuyo texto real ya no es el que ve cada tramo
+    def revisar(tramo, idx):
+        if lineas[idx].text == vistas[tramo].get(idx, originales[idx]): distintas[tramo].discard(idx)
+        else: distintas[tramo].add(idx)
+    lineas_con_honorificos = 0
+    for inicio, tramo, (found_honorifics_in_line, palabras_fuente) in zip(inicios, tramos, capturas):
+        idx_espanol, texto_nuevo, cambio = next(decisiones[tramo])
+        ventana = orden[bisect_left(inicios_espanol, inicio - rango_ms):bisect_right(inicios_espanol, inicio + rango_ms)]
+        valida = distintas[tramo].isdisjoint(ventana)
+        if idx_espanol is not None:
+            vistas[tramo][idx_espanol] = texto_nuevo
+            revisar(tramo, idx_espanol)
+        if not valida:
+            # Se busca solo entre las líneas de la ventana, en el orden del archivo como en la búsqueda completa
+            cercanas = sorted(ventana)
+            elegida = IndiceLineasEspanol([lineas[idx] for idx in cercanas]).buscar(inicio, palabras_fuente, rango_ms)
+            if elegida is None: continue
+            idx_espanol = cercanas[elegida]
+            texto_nuevo = reglas.aplicar(lineas[idx_espanol].text, found_honorifics_in_line)
+            cambio = texto_nuevo != lineas[idx_espanol].text
+        elif idx_espanol is None: continue
+        lineas_con_honorificos += cambio
+        lineas[idx_espanol].text = texto_nuevo
+        # La línea pudo quedar distinta de lo que ve cualquier tramo cuya zona la alcanza
+        inicio_linea = lineas[idx_espanol].start
+        for otro in range(bisect_right(cortes, inicio_linea - rango_ms - 1), min(len(trabajos), bisect_right(cortes, inicio_linea + rango_ms) + 1)):
+            revisar(otro, idx_espanol)
+    return lineas_con_honorificos
+
+def _insertar_fragmento(espanol, inicios, capturas, rango_ms):
+    # Corre en el pool de procesos: recibe (índice, inicio, texto) de las líneas en español del tramo y
+    # devuelve (índice o None, texto nuevo, si cambió) por cada línea fuente, en orden
+    lineas = [weebnizador_lector.EventoDirecto(inicio, texto, idx) for idx, inicio, texto in espanol]
+    decisiones = []
+    _insertar_en_serie(lineas, inicios, capturas, obtener_reglas_honorificos(), rango_ms, 'local', decisiones)
+    return [(None, None, False) if idx is None else (lineas[idx].numero_linea, texto, cambio) for idx, texto, cambio in decisiones]
+
+def _insertar_en_serie(subs_espanol, inicios, capturas, reglas, rango_ms, alineacion, decisiones=None):
+    indice_espanol = IndiceLineasEspanol(subs_espanol)
+    lineas_con_honorificos = 0
+    if alineacion == 'global':
+        # Una sola alineación para todo el archivo, calculada sobre el texto original en español
+        destinos = alinear_monotono(inicios, [palabras for _, palabras in capturas], indice_espanol, rango_ms)
+
+    for posicion_pendiente, (found_honorifics_in_line, palabras_fuente) in enumerate(capturas):
+        if alineacion == 'global': idx_espanol = destinos[posicion_pendiente]
+        else: idx_espanol = indice_espanol.buscar(inicios[posicion_pendiente], palabras_fuente, rango_ms)
+        if idx_espanol is not None:
+            linea_espanol_target = indice_espanol.lineas[idx_espanol]
+            texto_nuevo = reglas.aplicar(linea_espanol_target.text, found_honorifics_in_line)
+            if texto_nuevo != linea_espanol_target.text: lineas_con_honorificos += 1
+            if decisiones is not None: decisiones.append((idx_espanol, texto_nuevo, texto_nuevo != linea_espanol_target.text))
+            linea_espanol_target.text = texto_nuevo
+            indice_espanol.actualizar(idx_espanol)
+        elif decisiones is not None: decisiones.append((None, None, False))
+    return lineas_con_honorificos
+
+def _weebificar_con_contadores(*argumentos, **opciones):
+    # Envoltorio para el pool de procesos: el diccionario de contadores no vuelve solo desde el otro proceso
+    contadores = {}
+    resultados, mensajes = weebificar_variantes(*argumentos, contadores=contadores, **opciones)
+    return resultados, mensajes, contadores
+
+# Viñetas y numeración ("- ", "* ", "1. ", "2) ") que Gemini a veces antepone a cada par de la respuesta
+patron_vineta_respuesta = re.compile(r"^\s*(?:[-*•·]+|\d+[.)])\s*")
+patron_nombre_apellido = re.compile(r"\b([A-Z][a-zÀ-ÖØ-öø-ÿ]+)\s+([A-Z][a-zÀ-ÖØ-öø-ÿ]+)\b") # Ampliado para más caracteres latinos
+
+def _detectar_pares_nombre(textos):
+    """Pares 'Nombre Apellido' únicos de los textos."""
+    detectados = set()
+    for texto in textos:
+        # Dividir la línea de texto por el código de salto de línea \N de ASS
+        # Esto asegura que el regex solo opere en texto continuo dentro de cada "sub-línea" visual.
+        for segmento in texto.split("\\N"):
+            for nombre, apellido in patron_nombre_apellido.findall(segmento):
+                detectados.add(f"{nombre} {apellido}")
+    return detectados
+
+def _aplicar_nombres(textos, mapeo_nombres_invertidos):
+    """Devuelve [(posición, texto nuevo)] de los textos que cambian al invertir los nombres del mapeo."""
+    # Una sola expresión con todos los nombres (los más largos primero) y un diccionario para el reemplazo,
+    # así cada línea se recorre una vez sin importar cuántos nombres haya.
+    patron_nombres = re.compile(r'\b(?:' + '|'.join(re.escape(original) for original in sorted(mapeo_nombres_invertidos, key=len, reverse=True)) + r')\b')
+    reemplazar_nombre = lambda coincidencia: mapeo_nombres_invertidos[coincidencia.group(0)]
+    cambios = []
+    for posicion, texto in enumerate(textos):
+        texto_modificado = patron_nombres.sub(reemplazar_nombre, texto)
+        if texto != texto_modificado: cambios.append((posicion, texto_modificado))
+    return cambios
+
+def gemini_configurado():
+    return bool(GEMINI_API_KEY) and GEMINI_API_KEY != "TU_API_KEY_DE_GEMINI_AQUI"
+
+class ClienteGemini:
+    """Cliente de Gemini compartido por todo el proceso.
+
+    Configura la librería y crea el modelo una sola vez, limita cuántas consultas van a la vez y
+    reintenta las que fallan o tardan demasiado con una espera exponencial, sin pasarse del plazo.
+    """
+    # Errores que no se arreglan reintentando (clave inválida, solicitud rechazada, respuesta bloqueada)
+    ERRORES_DEFINITIVOS = ("InvalidArgument", "PermissionDenied", "Unauthenticated", "ValueError")
+
+    def __init__(self, api_key, modelo=GEMINI_MODELO, endpoint=None, max_concurrentes=4, reintentos=3, timeout_s=60):
+        self.api_key = api_key
+        self.nombre_modelo = modelo
+        self.endpoint = endpoint
+        self.reintentos = reintentos
+        self.timeout_s = timeout_s
+        self._semaforo = threading.BoundedSemaphore(max(1, max_concurrentes))
+        self._lock = threading.Lock()
+        self._modelo = None
+
+    def _obtener_modelo(self):
+        with self._lock:
+            if self._modelo is None:
+                import google.generativeai as genai # Importar la librería de Gemini solo cuando se usa
+                opciones = {"api_key": self.api_key}
+                if self.endpoint: opciones.update(transport="rest", client_options={"api_endpoint": self.endpoint})
+                genai.configure(**opciones)
+                self._modelo = genai.GenerativeModel(self.nombre_modelo)
+            return self._modelo
+
+    def generar(self, texto, plazo_s=None):
+        """Devuelve el texto de la respuesta. Lanza la última excepción si se agotan los reintentos o el plazo."""
+        modelo = self._obtener_modelo()
+        limite = time.monotonic() + plazo_s if plazo_s else None
+        for intento in range(self.reintentos + 1):
+            timeout = self.timeout_s
+            if limite is not None:
+                timeout = min(timeout, limite - time.monotonic())
+                if timeout <= 0: raise TimeoutError("Se agotó el plazo para consultar a Gemini")
+            try:
+                with self._semaforo:
+                    return modelo.generate_content(texto, request_options={"timeout": timeout}).text
+            except Exception as e:
+                if intento == self.reintentos or type(e).__name__ in self.ERRORES_DEFINITIVOS: raise
+                espera = min(30, 2 ** intento) * (0.5 + random.random())
+                if limite is not None: espera = min(espera, max(0, limite - time.monotonic()))
+                time.sleep(espera)
+
+_cliente_gemini = None
+
+def obtener_cliente_gemini():
+    global _cliente_gemini
+    with _lock_caches:
+        if _cliente_gemini is None:
+            _cliente_gemini = ClienteGemini(GEMINI_API_KEY, GEMINI_MODELO, gemini_endpoint, gemini_max_concurrentes, gemini_reintentos, gemini_timeout_s)
+        return _cliente_gemini
+
+def call_gemini_api(prompt_text, name_list_for_api):
+    if not gemini_configurado():
+        print("Error: API Key de Gemini no configurada. La inversión de nombres será omitida.")
+        return None
+
+    try:
+        full_prompt = f"{prompt_text}\n\nLista de nombres:\n{name_list_for_api}"
+        return obtener_cliente_gemini().generar(full_prompt, plazo_s=gemini_plazo_total_s)
+    except Exception as e:
+        print(f"Error al llamar a la API de Gemini: {e}")
+        return None
+
+# Instrucciones para Gemini al invertir pares "Nombre Apellido"
+PROMPT_INVERSION_NOMBRES = (
+    "De la siguiente lista de pares de palabras, donde cada palabra inicia con mayúscula, "
+    "identifica aquellos que son probablemente 'Nombre Apellido' de personas y cámbialos a 'Apellido Nombre'.\n"
+    "Si un par de palabras no parece ser un nombre de persona (por ejemplo, 'Autos Locos', 'Casa Azul', 'Perro Azul'), omítelo y no lo incluyas en la respuesta. Si detectas palabras en español o inglés junto a un nombre OMÍTELO, ya que esta lista se obtuvo de una pista de subtítulos, por lo que podría por error contener palabras capitalizadas junto a un nombre; por ejemplo 'Soy Hisoka', 'Eres Naruto'.\n"
+    "Si un par parece ser 'Título Nombre' (ej. 'Doctor Luis'), trátalo como 'Nombre Apellido' si 'Doctor' no es un nombre propio común; si 'Doctor' es el nombre, inviértelo. Usa tu mejor juicio para nombres comunes.\n"
+    "Devuelve ÚNICAMENTE la lista con los cambios realizados, un par por línea. No incluyas los pares omitidos.\n\n"
+    "Ejemplo de entrada:\n"
+    "Naruto Uzumaki\n"
+    "María García\n"
+    "Autos Locos\n"
+    "Perro Azul\n"
+    "El Pepe\n" 
+    "Ana López\n"
+    "Juan Pabro\n"
+    "Doctor Luis\n"
+    "Javier Rodríguez\n"
+    "Casa Azul\n\n"
+    "Ejemplo de salida esperada para la entrada anterior:\n"
+    "Uzumaki Naruto\n"
+    "García María\n"
+    "López Ana\n"
+    "Pabro Juan\n" # Si Gemini lo considera un nombre
+    "Luis Doctor\n" # O como lo interprete Gemini, podría ser Doctor Luis
+    "Rodríguez Javier"
+)
+
+def _ignorar(*args):
+    pass
+
+class MedicionArchivo:
+    """Tiempo de cada etapa y contadores del proceso de un MKV. Se vuelca como una línea de la traza JSON.
+
+    Las etapas anidadas se descuentan de la que las contiene, así los tiempos no se cuentan dos veces.
+    """
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.inicio = time.time()
+        self._inicio_monotono = time.perf_counter()
+        self._tiempo_internas = []
+        self.etapas = {}
+        self.contadores = {}
+        self.exito = False
+        self.duracion = 0.0
+
+    @contextmanager
+    def etapa(self, nombre):
+        inicio = time.perf_counter()
+        self._tiempo_internas.append(0.0)
+        try: yield
+        finally:
+            transcurrido = time.perf_counter() - inicio
+            internas = self._tiempo_internas.pop()
+            self.etapas[nombre] = self.etapas.get(nombre, 0.0) + transcurrido - internas
+            if self._tiempo_internas: self._tiempo_internas[-1] += transcurrido
+
+    def contar(self, nombre, cantidad=1):
+        self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+
+    def terminar(self, exito):
+        self.exito = exito
+        self.duracion = time.perf_counter() - self._inicio_monotono
+
+    def como_dict(self):
+        return {"archivo": self.archivo, "inicio": round(self.inicio, 3), "duracion_s": round(self.duracion, 6), "exito": self.exito,
+                "etapas": {nombre: round(segundos, 6) for nombre, segundos in self.etapas.items()}, "contadores": dict(self.contadores)}
+
+def resumir_mediciones(mediciones, duracion_lote):
+    """Devuelve las líneas del resumen de un lote: reparto del tiempo por etapa y archivos/líneas por segundo."""
+    if not mediciones: return []
+    tiempos_etapas, contadores = {}, {}
+    for medicion in mediciones:
+        for nombre, segundos in medicion.etapas.items(): tiempos_etapas[nombre] = tiempos_etapas.get(nombre, 0.0) + segundos
+        for nombre, cantidad in medicion.contadores.items(): contadores[nombre] = contadores.get(nombre, 0) + cantidad
+    duracion_lote = max(duracion_lote, 1e-9)
+    lineas = contadores.get("lineas_espanol", 0)
+    resumen = [f"Resumen del lote: {len(mediciones)} archivo(s) en {duracion_lote:.2f} s "
+               f"({len(mediciones) / duracion_lote:.2f} archivos/s, {lineas / duracion_lote:.0f} líneas/s)"]
+    total_etapas = sum(tiempos_etapas.values()) or 1e-9
+    for nombre, segundos in sorted(tiempos_etapas.items(), key=lambda item: item[1], reverse=True):
+        resumen.append(f"  {nombre}: {segundos:.2f} s ({segundos / total_etapas:.0%})")
+    if contadores: resumen.append("  " + ", ".join(f"{nombre}={cantidad}" for nombre, cantidad in sorted(contadores.items())))
+    return resumen
+
+class MotorWeebnizador:
+    """Procesa archivos MKV en modo 'multi' (subtítulos del MKV) o 'extra' (subtítulo español externo).
+
+    El avance se informa mediante funciones opcionales: al_log(mensaje), al_progreso_archivo(0-100),
+    al_cambiar_archivo(texto) y al_progreso_total(0-100). La ventana las conecta a sus señales de Qt
+    y la línea de comandos a la consola.
+    """
+    def __init__(self, mode='multi', workers=None, al_log=None, al_progreso_archivo=None, al_cambiar_archivo=None, al_progreso_total=None):
+        self.mode = mode
+        self.mkvextract_path = mkvextract_path
+        self.mkvmerge_path = mkvmerge_path
+        self.workers = workers
+        self.pool_hilos = None
+        self.pool_procesos = None
+        self._procesos = 0
+        self._archivos_en_procesos = False
+        self.pool_gemini = None
+        self._lock_pool_gemini = threading.Lock()
+        self._contador_archivos = 0
+        self.al_log = al_log or _ignorar
+        self.al_progreso_archivo = al_progreso_archivo or _ignorar
+        self.al_cambiar_archivo = al_cambiar_archivo or _ignorar
+        self.al_progreso_total = al_progreso_total or _ignorar
+        # Función que consulta a Gemini; se puede reemplazar por un modelo falso para probar sin red
+        self.llamar_gemini = call_gemini_api
+        self.current_file_num = 0
+        self.current_file_total = 0
+        # Con varios archivos a la vez, la etiqueta de la ventana sigue al archivo en curso más antiguo ("foco")
+        self._lock_progreso = threading.Lock()
+        self._archivo_del_hilo = threading.local()
+        self._en_curso = {}
+        self._archivo_foco = None
+        # Mediciones por etapa del lote en curso (procesar_lote) y traza JSON-lines opcional
+        self.archivo_traza = archivo_traza
+        self.mediciones = deque(maxlen=mediciones_max_en_memoria)
+        self.duracion_lote = 0.0
+        self._lock_traza = threading.Lock()
+        # Manifiestos por carpeta; con forzar=True se reprocesa aunque el manifiesto diga que no hubo cambios
+        self.forzar = False
+        # El modo cola usa leases en lugar del diario para saber qué quedó a medias
+        self.usar_diario = True
+        self._manifiestos = {}
+        self._lock_manifiestos = threading.Lock()
+
+    def _emit_log(self, message):
+        self.al_log(message)
+
+    def _etapa(self, nombre):
+        medicion = getattr(self._archivo_del_hilo, 'medicion', None)
+        return medicion.etapa(nombre) if medicion else nullcontext()
+
+    def _contar(self, nombre, cantidad=1):
+        medicion = getattr(self._archivo_del_hilo, 'medicion', None)
+        if medicion: medicion.contar(nombre, cantidad)
+
+    def _registrar_medicion(self, medicion):
+        with self._lock_traza:
+            self.mediciones.append(medicion)
+            if not self.archivo_traza: return
+            try:
+                with open(self.archivo_traza, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(medicion.como_dict(), ensure_ascii=False) + "\n")
+            except OSError as e: self._emit_log(f"Error escribiendo la traza: {e}")
+
+    def resumen_lote(self):
+        """Líneas de texto con el reparto de tiempo por etapa y el rendimiento del último lote."""
+        return resumir_mediciones(self.mediciones, self.duracion_lote)
+
+    def _manifiesto(self, directorio):
+        if not usar_manifiesto: return None
+        directorio = os.path.abspath(directorio)
+        with self._lock_manifiestos:
+            if directorio not in self._manifiestos: self._manifiestos[directorio] = ManifiestoCarpeta(directorio, con_diario=self.usar_diario)
+            return self._manifiestos[directorio]
+
+    def _gemini_activo(self):
+        return gemini_configurado() or self.llamar_gemini is not call_gemini_api
+
+    def _huella_entradas(self, mkv_file, sub_externo):
+        info = os.stat(mkv_file)
+        datos = [VERSION_REGLAS, self.mode, info.st_size, info.st_mtime_ns, hash_archivo(sub_externo) if sub_externo else None,
+                 honorificos, palabras_redundantes, firma_prioridad_idiomas(), self._gemini_activo(), usar_lectura_directa, alineacion_honorificos,
+                 todas_las_variantes_espanol and self.mode == 'multi', motor_extraccion, usar_clasificador_nombres,
+                 estimar_desfase and [desfase_maximo_segundos, desfase_tramo_segundos, rango_con_desfase_segundos]]
+        return hashlib.sha1(json.dumps(datos, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def _subtitulo_externo(self, dir_name, base_name, entrada, interrumpido):
+        """Devuelve (subtítulo externo a usar, archivo a mover a <base>_original.ass o None).
+
+        Un <base>.ass que es nuestra propia salida (según el manifiesto, o porque ya existe el
+        _original.ass de una pasada anterior) no se toma como subtítulo nuevo.
+        """
+        ruta_ass = os.path.join(dir_name, f"{base_name}.ass")
+        ruta_srt = os.path.join(dir_name, f"{base_name}.srt")
+        ruta_original = os.path.join(dir_name, f"{base_name}_original.ass")
+        hay_original = os.path.isfile(ruta_original)
+        if os.path.isfile(ruta_ass):
+            if entrada and entrada.get("salida") and not interrumpido: es_salida_propia = hash_archivo(ruta_ass) == entrada["salida"]
+            else: es_salida_propia = hay_original
+            if not es_salida_propia: return ruta_original, ruta_ass
+        if os.path.isfile(ruta_srt): return ruta_original, ruta_srt
+        if hay_original: return ruta_original, None
+        return None, None
+
+    def _respaldar_externo(self, por_renombrar, ruta_original):
+        """Mueve el subtítulo externo a <base>_original.ass sin pisar un _original.ass que ya exista.
+
+        Si ya hay uno (por ejemplo, el usuario editó a mano el <base>.ass generado), el existente se
+        conserva como <base>_original.N.ass, porque puede ser la única copia del español sin tocar.
+        """
+        if os.path.exists(ruta_original):
+            raiz, extension = os.path.splitext(ruta_original)
+            numero = 1
+            while os.path.exists(f"{raiz}.{numero}{extension}"): numero += 1
+            respaldo = f"{raiz}.{numero}{extension}"
+            os.rename(ruta_original, respaldo)
+            self._emit_log(f"Ya existía {os.path.basename(ruta_original)}; se conserva como {os.path.basename(respaldo)} antes de usar {os.path.basename(por_renombrar)}.")
+        os.replace(por_renombrar, ruta_original)
+
+    def _estado_manifiesto(self, dir_name, base_name):
+        """Devuelve (manifiesto, entrada guardada del video, si su proceso anterior quedó interrumpido)."""
+        manifiesto = self._manifiesto(dir_name)
+        if manifiesto is None: return None, None, False
+        return manifiesto, manifiesto.obtener(base_name), base_name in manifiesto.interrumpidos
+
+    def _sin_cambios(self, entrada, huella, output_path):
+        if self.forzar or not entrada or entrada.get("huella") != huella: return False
+        directorio = os.path.dirname(output_path)
+        try:
+            return hash_archivo(output_path) == entrada.get("salida") and all(
+                hash_archivo(os.path.join(directorio, nombre)) == hash_variante for nombre, hash_variante in entrada.get("variantes", {}).items())
+        except OSError: return False
+
+    def al_dia(self, mkv_file):
+        """True si, según el manifiesto, la salida de este MKV ya está al día (sin procesarlo ni tocar nada)."""
+        dir_name = os.path.dirname(mkv_file)
+        base_name = os.path.splitext(os.path.basename(mkv_file))[0]
+        _, entrada, interrumpido = self._estado_manifiesto(dir_name, base_name)
+        if not entrada or interrumpido: return False
+        sub_externo, por_renombrar = self._subtitulo_externo(dir_name, base_name, entrada, interrumpido)
+        if self.mode == 'extra' and not sub_externo: return False
+        return self._sin_cambios(entrada, self._huella_entradas(mkv_file, por_renombrar or sub_externo), os.path.join(dir_name, f"{base_name}.ass"))
+
+    def _registrar_salida(self, manifiesto, base_name, huella, output_path, rutas_variantes=()):
+        if manifiesto is None: return
+        try:
+            manifiesto.registrar(base_name, {"huella": huella, "salida": hash_archivo(output_path), "pistas": getattr(self._archivo_del_hilo, 'pistas', None),
+                                             "variantes": {os.path.basename(ruta): hash_archivo(ruta) for ruta in rutas_variantes},
+                                             "modo": self.mode, "fecha": time.time()})
+        except OSError as e: self._emit_log(f"Error guardando el manifiesto: {e}")
+
+    def _emit_current_file_progress(self, value):
+        value = max(0, min(100, value))
+        idx = getattr(self._archivo_del_hilo, 'idx', None)
+        with self._lock_progreso:
+            if idx in self._en_curso: self._en_curso[idx][1] = value
+            if idx != self._archivo_foco: return
+            self.al_progreso_archivo(value)
+
+    def _iniciar_archivo(self, idx, nombre):
+        self._archivo_del_hilo.idx = idx
+        with self._lock_progreso:
+            self._en_curso[idx] = [nombre, 0]
+            if self._archivo_foco is None: self._enfocar(idx)
+
+    def _terminar_archivo(self, idx):
+        with self._lock_progreso:
+            self._en_curso.pop(idx, None)
+            if self._archivo_foco == idx:
+                self._archivo_foco = None
+                if self._en_curso: self._enfocar(min(self._en_curso))
+        self._archivo_del_hilo.idx = None
+
+    def _enfocar(self, idx):
+        # Se llama con _lock_progreso tomado
+        nombre, progreso = self._en_curso[idx]
+        self._archivo_foco = idx
+        self.current_file_num = idx + 1
+        self.current_file_name_for_label = nombre
+        self.al_cambiar_archivo(f"Procesando: {nombre}")
+        self.al_progreso_archivo(progreso)
+
+    def _extract_subtitles_metadata(self, mkv_file):
+        try:
+            cache = obtener_cache_identificacion()
+            identificacion_cacheada = None
+            if cache:
+                try: identificacion_cacheada = cache.obtener(mkv_file)
+                except (OSError, sqlite3.Error, ValueError) as e: self._emit_log(f"Error leyendo la cache de identificación: {e}")
+
+            if identificacion_cacheada:
+                json_output, pistas_cacheadas = identificacion_cacheada
+                self._contar("cache_identify_aciertos")
+                self._emit_log(f"Identificación de {os.path.basename(mkv_file)} tomada de la cache.")
+            else:
+                pistas_cacheadas = None
+                json_output = self._identificar_nativo(mkv_file) if motor_extraccion == 'nativo' else None
+                if json_output is None:
+                    identify_command = [self.mkvmerge_path, "--identify", "-J", mkv_file]
+                    with self._etapa("identificacion"):
+                        result = subprocess.run(identify_command, capture_output=True, text=True, encoding='utf-8', errors='replace', check=True)
+
+                    if not result.stdout:
+                        self._emit_log("Error: No output received from mkvmerge")
+                        return None, None, None
+                    try:
+                        json_output = json.loads(result.stdout)
+                    except json.JSONDecodeError as e:
+                        self._emit_log(f"Error decoding JSON from mkvmerge: {e}")
+                        return None, None, None
+            self._emit_current_file_progress(10)
+
+            if pistas_cacheadas is not None:
+                pistas_por_id = {track['id']: track for track in json_output['tracks']}
+                best_subtitles = {lang_key: pistas_por_id.get(elegida[0]) if elegida else None for lang_key, elegida in pistas_cacheadas.items()}
+                best_scores = {lang_key: elegida[1] if elegida else 0 for lang_key, elegida in pistas_cacheadas.items()}
+            else:
+                best_subtitles, best_scores = elegir_mejores_pistas(json_output)
+                if cache:
+                    pistas_elegidas = {lang_key: [track['id'], best_scores[lang_key]] if track else None for lang_key, track in best_subtitles.items()}
+                    try: cache.guardar(mkv_file, json_output, pistas_elegidas)
+                    except (OSError, sqlite3.Error) as e: self._emit_log(f"Error guardando la cache de identificación: {e}")
+
+            self._emit_current_file_progress(20)
+            base_name = os.path.splitext(os.path.basename(mkv_file))[0]
+            pistas = {lang_key: track for lang_key, track in best_subtitles.items() if track is not None}
+            if todas_las_variantes_espanol and self.mode == 'multi':
+                # Las demás pistas en español salen en la misma pasada de mkvextract, con clave spa.<etiqueta>
+                for etiqueta, track in variantes_espanol(json_output, pistas.get('spa')).items(): pistas[f"spa.{etiqueta}"] = track
+            self._archivo_del_hilo.pistas = {lang_key: track['id'] for lang_key, track in pistas.items()}
+            self._archivo_del_hilo.variantes_espanol = []
+            subs_extraidos = {}
+            if pistas:
+                textos = self._extraer_nativo(mkv_file, pistas) if motor_extraccion == 'nativo' else None
+                if textos is None: textos = self._extraer_mkvtoolnix(mkv_file, pistas)
+                if textos is None: return None, None, None
+                for lang_key_extract, track_info_extract in pistas.items():
+                    if lang_key_extract not in textos: continue
+                    subs_extraidos[lang_key_extract] = SubtituloEnMemoria(f"{base_name}_{lang_key_extract}.ass", textos[lang_key_extract])
+                    if lang_key_extract.startswith("spa."):
+                        etiqueta = lang_key_extract.split(".", 1)[1]
+                        self._archivo_del_hilo.variantes_espanol.append((etiqueta, subs_extraidos.pop(lang_key_extract)))
+                        self._emit_log(f"Variante en español {etiqueta} encontrada (ID: {track_info_extract['id']}, Title: {track_info_extract['properties'].get('track_name', '')})")
+                        continue
+                    self._emit_log(f"Best {lang_key_extract} subtitle found (ID: {track_info_extract['id']}, Title: {track_info_extract['properties'].get('track_name', '')}, Lang: {track_info_extract['properties'].get('language', '')}, IETF: {track_info_extract['properties'].get('language_ietf', '')} Score: {best_scores[lang_key_extract]})")
+
+            self._emit_current_file_progress(50)
+            return subs_extraidos.get('eng'), subs_extraidos.get('spa'), subs_extraidos.get('may')
+
+        except (subprocess.CalledProcessError, json.JSONDecodeError) as e:
+            self._emit_log(f"Error processing MKV file for subtitle extraction: {e}")
+            return None, None, None
+        except Exception as e:
+            self._emit_log(f"Unexpected error during subtitle extraction: {e}")
+            return None, None, None
+
+    def _identificar_nativo(self, mkv_file):
+        """Identificación con weebnizador_matroska; None si hay que usar mkvmerge."""
+        try:
+            with self._etapa("identificacion"): return weebnizador_matroska.identificar(mkv_file)
+        # Un archivo raro puede romper el lector con algo que no sea ErrorMatroska; mkvmerge sigue siendo la red
+        except (weebnizador_matroska.ErrorMatroska, OSError, IndexError, ValueError, KeyError) as e:
+            self._emit_log(f"El lector nativo no pudo identificar {os.path.basename(mkv_file)} ({e}); se usa mkvmerge.")
+            return None
+
+    def _sin_honorificos(self, lang_key, track, puntuable):
+        # Las pistas fuente sin honoríficos no se llegan a cargar: basta una pasada por su contenido crudo
+        if lang_key not in ('eng', 'may') or puntuar_honorificos(puntuable)[0]: return False
+        self._emit_log(f"La pista {lang_key} (ID: {track['id']}) no contiene honoríficos, se omite.")
+        return True
+
+    def _extraer_nativo(self, mkv_file, pistas):
+        """Devuelve {idioma: texto} leyendo las pistas con weebnizador_matroska, o None si hay que usar mkvextract."""
+        try:
+            with self._etapa("extraccion"): por_id = weebnizador_matroska.extraer_subtitulos(mkv_file, [track['id'] for track in pistas.values()])
+        except (weebnizador_matroska.ErrorMatroska, OSError, IndexError, ValueError, KeyError) as e:
+            self._emit_log(f"El lector nativo no pudo extraer los subtítulos de {os.path.basename(mkv_file)} ({e}); se usa mkvextract.")
+            return None
+        textos = {}
+        for lang_key, track in pistas.items():
+            texto = por_id[track['id']]
+            if not self._sin_honorificos(lang_key, track, SubtituloEnMemoria(lang_key, texto)): textos[lang_key] = texto
+        return textos
+
+    def _extraer_mkvtoolnix(self, mkv_file, pistas):
+        """Devuelve {idioma: texto} con una sola pasada de mkvextract, o None si falló."""
+        # Se escribe fuera de la carpeta del video y se lee a memoria
+        directorio_extraccion = tempfile.mkdtemp(prefix="weebnizador_", dir=directorio_temporal)
+        try:
+            rutas_temporales = {lang_key: os.path.join(directorio_extraccion, f"{lang_key}.sub") for lang_key in pistas}
+            extract_command = [self.mkvextract_path, mkv_file, 'tracks'] + [f'{track["id"]}:{rutas_temporales[lang_key]}' for lang_key, track in pistas.items()]
+            try:
+                with self._etapa("extraccion"): subprocess.run(extract_command, check=True, capture_output=True)
+            except subprocess.CalledProcessError as e:
+                self._emit_log(f"Error extracting subtitles: {e.stderr.decode(errors='replace') if e.stderr else e}")
+                return None
+            textos = {}
+            for lang_key_extract, track_info_extract in pistas.items():
+                try:
+                    if self._sin_honorificos(lang_key_extract, track_info_extract, rutas_temporales[lang_key_extract]): continue
+                    with open(rutas_temporales[lang_key_extract], encoding='utf-8') as f: textos[lang_key_extract] = f.read()
+                except (OSError, UnicodeDecodeError) as e:
+                    self._emit_log(f"Error reading extracted {lang_key_extract} subtitle: {e}")
+            return textos
+        finally:
+            shutil.rmtree(directorio_extraccion, ignore_errors=True)
+
+    def _invertir_nombres_via_gemini(self, subs_espanol, ambito=None):
+        self._emit_log("Iniciando detección de Nombre-Apellido para inversión vía Gemini.")
+        lineas = list(subs_espanol)
+        textos = [linea.text for linea in lineas]
+        nombres_detectados_unicos = set()
+        for _, detectados in self._repartir(_detectar_pares_nombre, textos): nombres_detectados_unicos |= detectados
+
+        if not nombres_detectados_unicos:
+            self._emit_log("No se detectaron patrones Nombre-Apellido para enviar a Gemini.")
+            return subs_espanol
+
+        self._contar("nombres_detectados", len(nombres_detectados_unicos))
+        decididos, pendientes = {}, nombres_detectados_unicos
+        if usar_clasificador_nombres:
+            decididos, pendientes = obtener_clasificador_nombres().separar(nombres_detectados_unicos)
+            self._contar("nombres_locales", len(decididos))
+            if decididos:
+                self._emit_log(f"Decididos sin Gemini: {len(decididos)} ({sum(1 for invertido in decididos.values() if invertido)} invertidos). Dudosos: {len(pendientes)}.")
+        cache_nombres = obtener_cache_nombres() if ambito and pendientes else None
+        decididos_cache = {}
+        if cache_nombres:
+            try: decididos_cache = cache_nombres.consultar(ambito, pendientes)
+            except sqlite3.Error as e: self._emit_log(f"Error leyendo la cache de nombres: {e}")
+        self._contar("cache_nombres_aciertos", len(decididos_cache))
+        decididos.update(decididos_cache)
+        mapeo_nombres_invertidos = {nombre: invertido for nombre, invertido in decididos.items() if invertido}
+        nombres_nuevos = nombres_detectados_unicos - decididos.keys()
+        if decididos_cache:
+            self._emit_log(f"Nombres ya decididos en esta carpeta: {len(decididos_cache)} ({sum(1 for invertido in decididos_cache.values() if invertido)} invertidos). Nuevos para Gemini: {len(nombres_nuevos)}.")
+
+        if nombres_nuevos:
+            self._emit_log(f"Nombres detectados para Gemini (hasta 5): {', '.join(list(nombres_nuevos)[:5])}...")
+            nombres_ordenados = sorted(nombres_nuevos)
+            tamano_lote = max(1, gemini_nombres_por_lote)
+            lotes = [nombres_ordenados[inicio:inicio + tamano_lote] for inicio in range(0, len(nombres_ordenados), tamano_lote)]
+
+            if len(lotes) == 1: self._emit_log("Enviando solicitud a Gemini API para inversión de nombres...")
+            else: self._emit_log(f"Enviando {len(nombres_ordenados)} nombres a Gemini API en {len(lotes)} solicitudes paralelas...")
+            self._contar("nombres_enviados", len(nombres_nuevos))
+            with self._etapa("gemini"): respuestas = self._consultar_gemini(lotes)
+
+            lotes_fallidos = 0
+            for lote, respuesta_gemini_texto in zip(lotes, respuestas):
+                # None indica error; una respuesta vacía es válida y significa que ningún par era un nombre
+                if respuesta_gemini_texto is None:
+                    lotes_fallidos += 1
+                    continue
+                # Se indexa la respuesta por (primera, segunda) palabra para buscar cada par invertido en O(1)
+                # Una línea que no es la inversión de un par del lote (preámbulo, texto cortado) no se entendió
+                invertidos_esperados = {tuple(reversed(nombre.split())) for nombre in lote}
+                respuestas_por_partes = {}
+                lineas_no_entendidas = 0
+                for linea_api in respuesta_gemini_texto.split('\n'):
+                    partes_invertido_api = tuple(patron_vineta_respuesta.sub('', linea_api).split())
+                    if not partes_invertido_api: continue
+                    if partes_invertido_api in invertidos_esperados: respuestas_por_partes.setdefault(partes_invertido_api, ' '.join(partes_invertido_api))
+                    else: lineas_no_entendidas += 1
+
+                mapeo_nuevos = {}
+                for nombre_completo_original_str in lote:
+                    partes_original = nombre_completo_original_str.split()
+                    if len(partes_original) != 2: continue
+                    invertido_api_str = respuestas_por_partes.get((partes_original[1], partes_original[0]))
+                    if invertido_api_str:
+                        mapeo_nuevos[nombre_completo_original_str] = invertido_api_str
+                        self._emit_log(f"Mapeo Gemini: '{nombre_completo_original_str}' -> '{invertido_api_str}'")
+                mapeo_nombres_invertidos.update(mapeo_nuevos)
+                # Lo que Gemini no devolvió queda registrado como descartado para no volver a preguntarlo, pero
+                # solo si la respuesta se entendió: un formato inesperado o cortado no debe descartar nombres reales
+                if not cache_nombres: continue
+                if not respuesta_gemini_texto.strip() or (mapeo_nuevos and not lineas_no_entendidas):
+                    decisiones = {nombre: mapeo_nuevos.get(nombre) for nombre in lote}
+                else:
+                    decisiones = mapeo_nuevos
+                    self._emit_log(f"La respuesta de Gemini no tenía el formato esperado ({lineas_no_entendidas} líneas sin entender); los nombres no devueltos no se guardan como descartados.")
+                if decisiones:
+                    try: cache_nombres.guardar(ambito, decisiones)
+                    except sqlite3.Error as e: self._emit_log(f"Error guardando la cache de nombres: {e}")
+            if lotes_fallidos == len(lotes):
+                self._emit_log("No se recibió respuesta de Gemini o hubo un error. Solo se usarán los nombres ya conocidos.")
+            elif lotes_fallidos:
+                self._emit_log(f"Fallaron {lotes_fallidos} de {len(lotes)} solicitudes a Gemini; esos nombres se volverán a consultar la próxima vez.")
+
+        if not mapeo_nombres_invertidos:
+            self._emit_log("Gemini no devolvió nombres invertidos en el formato esperado o no encontró coincidencias.")
+            return subs_espanol
+
+        self._emit_log("Aplicando nombres invertidos a los subtítulos...")
+        for desde, cambios in self._repartir(_aplicar_nombres, textos, mapeo_nombres_invertidos):
+            for posicion, texto_modificado in cambios: lineas[desde + posicion].text = texto_modificado
+
+        self._emit_log("Inversión de Nombre-Apellido completada.")
+        return subs_espanol
+
+
+    def _fragmentos(self, lineas):
+        """En cuántos tramos repartir una pista de `lineas` líneas entre los procesos del pool (1 = no repartir)."""
+        if self.pool_procesos is None or not lineas_por_fragmento or lineas < 2 * lineas_por_fragmento: return 1
+        return max(1, min(self._procesos, lineas // lineas_por_fragmento))
+
+    def _repartir(self, funcion, textos, *argumentos):
+        """Aplica funcion(parte, *argumentos) a partes consecutivas de `textos`, en el pool si la pista es larga.
+
+        Devuelve [(posición donde empieza la parte, resultado)] en orden.
+        """
+        fragmentos = self._fragmentos(len(textos))
+        if fragmentos == 1: return [(0, funcion(textos, *argumentos))]
+        tamano = -(-len(textos) // fragmentos)
+        trabajos = [(desde, self.pool_procesos.submit(funcion, textos[desde:desde + tamano], *argumentos)) for desde in range(0, len(textos), tamano)]
+        return [(desde, trabajo.result()) for desde, trabajo in trabajos]
+
+    def _consultar_gemini(self, lotes):
+        """Consulta cada lote de nombres (en paralelo si hay varios) y devuelve las respuestas en el mismo orden."""
+        consultar = lambda lote: self.llamar_gemini(PROMPT_INVERSION_NOMBRES, "\n".join(lote))
+        if len(lotes) == 1: return [consultar(lotes[0])]
+        with self._lock_pool_gemini:
+            if self.pool_gemini is None: self.pool_gemini = ThreadPoolExecutor(max_workers=max(1, gemini_max_concurrentes))
+        return list(self.pool_gemini.map(consultar, lotes))
+
+    def _reemplazar_honorificos(self, sub_ingles, sub_espanol, sub_malayo, output_path, rango_segundos=5, variantes=()):
+        """Weebifica sub_espanol en output_path y cada (subtítulo, ruta) de `variantes` usando la misma fuente.
+
+        Devuelve True solo si se guardaron todas las salidas.
+        """
+        self._emit_current_file_progress(55)
+        objetivos = [(sub_espanol, output_path)] + list(variantes)
+        argumentos = (sub_ingles, [sub for sub, _ in objetivos], sub_malayo, rango_segundos)
+        # Las opciones viajan como argumentos porque los procesos del pool no ven los cambios hechos en tiempo de ejecución
+        opciones = {"lectura_directa": usar_lectura_directa, "alineacion": alineacion_honorificos, "desfase": estimar_desfase}
+        fragmentos = 1
+        if self.pool_procesos is not None and lineas_por_fragmento:
+            try: fragmentos = self._fragmentos(max(contar_eventos(fuente) for fuente in (sub_ingles, sub_malayo) if fuente))
+            except (OSError, ValueError): pass
+        with self._etapa("honorificos"):
+            if fragmentos > 1:
+                # Pista muy larga: se carga en este hilo y los tramos de la búsqueda se reparten en el pool de procesos
+                self._emit_log(f"Pista larga: la búsqueda de honoríficos se reparte en hasta {fragmentos} tramos.")
+                self._contar("fragmentos_honorificos", fragmentos)
+                resultados, mensajes, contadores = _weebificar_con_contadores(*argumentos, ejecutor=self.pool_procesos, fragmentos=fragmentos, **opciones)
+            elif not self._archivos_en_procesos: resultados, mensajes, contadores = _weebificar_con_contadores(*argumentos, **opciones)
+            else: resultados, mensajes, contadores = self.pool_procesos.submit(_weebificar_con_contadores, *argumentos, **opciones).result()
+        for nombre, cantidad in contadores.items(): self._contar(nombre, cantidad)
+        for mensaje in mensajes: self._emit_log(mensaje)
+        if resultados[0] is None: return False
+
+        self._emit_current_file_progress(80)
+        exito = True
+        for subs_espanol, ruta_salida in zip(resultados, (ruta for _, ruta in objetivos)):
+            if subs_espanol is None: exito = False; continue
+            exito = self._guardar_weebificado(subs_espanol, ruta_salida) and exito
+        if exito: self._emit_current_file_progress(100)
+        return exito
+
+    def _guardar_weebificado(self, subs_espanol, output_path):
+        if self._gemini_activo():
+            try:
+                with self._etapa("nombres"): subs_espanol = self._invertir_nombres_via_gemini(subs_espanol, ambito=os.path.dirname(os.path.abspath(output_path)))
+            except Exception as e_gemini:
+                self._emit_log(f"Error durante la inversión de nombres con Gemini: {e_gemini}")
+        else:
+            self._emit_log("API Key de Gemini no configurada, omitiendo inversión de nombres.")
+        
+        self._emit_current_file_progress(90) 
+        try:
+            with self._etapa("guardado"): guardar_subtitulo(subs_espanol, output_path)
+            self._emit_log(f"Subtítulo en español modificado guardado en: {output_path}")
+            return True
+        except Exception as e:
+            self._emit_log(f"Error guardando subtítulo modificado en Español: {e}")
+            return False
+
+    def _procesar_archivo_mkv_multisubs(self, mkv_file):
+        self._emit_log(f"Modo: Multi-subs para {os.path.basename(mkv_file)}")
+        self._emit_current_file_progress(5)
+        base_name = os.path.splitext(os.path.basename(mkv_file))[0]
+        dir_name = os.path.dirname(mkv_file)
+        original_sub_espanol_path = os.path.join(dir_name, f"{base_name}_original.ass")
+        output_path = os.path.join(dir_name, f"{base_name}.ass")
+        manifiesto, entrada, interrumpido = self._estado_manifiesto(dir_name, base_name)
+        sub_externo, por_renombrar = self._subtitulo_externo(dir_name, base_name, entrada, interrumpido)
+        huella = self._huella_entradas(mkv_file, por_renombrar or sub_externo)
+        if self._sin_cambios(entrada, huella, output_path):
+            self._emit_log(f"{base_name}.mkv no cambió desde la última pasada, se omite.")
+            self._contar("omitidos_sin_cambios")
+            return True
+        sub_espanol_path_for_process = None
+        using_external_sub = False
+
+        try:
+            if por_renombrar: self._respaldar_externo(por_renombrar, original_sub_espanol_path)
+            if sub_externo: sub_espanol_path_for_process = sub_externo; using_external_sub = True
+        except OSError as e: self._emit_log(f"Error al renombrar subtítulo externo: {e}.")
+
+        extracted_eng, extracted_spa, extracted_may = self._extract_subtitles_metadata(mkv_file)
+
+        if not sub_espanol_path_for_process: 
+            if extracted_spa:
+                sub_espanol_path_for_process = extracted_spa
+                self._emit_log("Usando subtítulo en Español extraído del MKV.")
+            else:
+                self._emit_log("No se encontraron subtítulos en español. No se puede procesar."); return False
+        else: self._emit_log(f"Usando subtítulo en Español externo: {original_sub_espanol_path}")
+        
+        # Con un subtítulo externo se procesa solo ese; las variantes del MKV salen solo si se usa la pista extraída
+        variantes = [] if using_external_sub else [(sub, os.path.join(dir_name, f"{base_name}.{etiqueta}.ass"))
+                                                    for etiqueta, sub in getattr(self._archivo_del_hilo, 'variantes_espanol', [])]
+        success = self._reemplazar_honorificos(extracted_eng, sub_espanol_path_for_process, extracted_may, output_path, variantes=variantes)
+        if success:
+            self._registrar_salida(manifiesto, base_name, huella, output_path, [ruta for _, ruta in variantes])
+            self._emit_log(f"Proceso completado para {base_name}.mkv.")
+            if using_external_sub: self._emit_log(f"Subtítulo original respaldado: {original_sub_espanol_path}")
+        else: self._emit_log(f"Falló el proceso para {base_name}.mkv.")
+        return success
+
+    def _procesar_archivo_mkv_extrasub(self, mkv_file):
+        self._emit_log(f"Modo: Extra-sub para {os.path.basename(mkv_file)}")
+        self._emit_current_file_progress(5)
+        base_name = os.path.splitext(os.path.basename(mkv_file))[0]
+        dir_name = os.path.dirname(mkv_file)
+        original_sub_espanol_path = os.path.join(dir_name, f"{base_name}_original.ass")
+        output_path = os.path.join(dir_name, f"{base_name}.ass")
+        manifiesto, entrada, interrumpido = self._estado_manifiesto(dir_name, base_name)
+        sub_externo, por_renombrar = self._subtitulo_externo(dir_name, base_name, entrada, interrumpido)
+        if not sub_externo: self._emit_log(f"No se encontró subtítulo externo {base_name}.ass/srt."); return False
+        huella = self._huella_entradas(mkv_file, por_renombrar or sub_externo)
+        if self._sin_cambios(entrada, huella, output_path):
+            self._emit_log(f"{base_name}.mkv no cambió desde la última pasada, se omite.")
+            self._contar("omitidos_sin_cambios")
+            return True
+
+        try:
+            if por_renombrar: self._respaldar_externo(por_renombrar, original_sub_espanol_path)
+            sub_espanol_path_for_process = sub_externo
+        except OSError as e: self._emit_log(f"Error al renombrar subtítulo externo: {e}."); return False
+
+        extracted_eng, _, extracted_may = self._extract_subtitles_metadata(mkv_file)
+        
+        if sub_espanol_path_for_process: 
+            success = self._reemplazar_honorificos(extracted_eng, sub_espanol_path_for_process, extracted_may, output_path)
+            if success:
+                self._registrar_salida(manifiesto, base_name, huella, output_path)
+                self._emit_log(f"Proceso completado para {base_name}.mkv.")
+                self._emit_log(f"Subtítulo original respaldado: {original_sub_espanol_path}")
+            else: self._emit_log(f"Falló el proceso para {base_name}.mkv.")
+            return success
+        else: self._emit_log("Error: no hay subtítulo en español para procesar.")
+        return False
+
+    def _procesar_archivo(self, i, file_path):
+        if not (file_path and os.path.isfile(file_path) and file_path.endswith('.mkv')):
+            self._emit_log(f"Archivo no válido, omitiendo: {file_path}")
+            return False
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        self._iniciar_archivo(i, f"{base_name}.mkv")
+        medicion = self._archivo_del_hilo.medicion = MedicionArchivo(file_path)
+        self._archivo_del_hilo.pistas = None
+        self._archivo_del_hilo.variantes_espanol = []
+        manifiesto = self._manifiesto(os.path.dirname(file_path))
+        success = False
+        try:
+            if manifiesto:
+                if base_name in manifiesto.interrumpidos: self._emit_log(f"El proceso anterior de {base_name}.mkv se interrumpió; se retoma.")
+                try: manifiesto.anotar(base_name, "inicio")
+                except OSError as e: self._emit_log(f"Error escribiendo el diario: {e}")
+            if self.mode == 'multi': success = self._procesar_archivo_mkv_multisubs(file_path)
+            else: success = self._procesar_archivo_mkv_extrasub(file_path)
+            self._emit_current_file_progress(100)
+        except Exception as e:
+            self._emit_log(f"Error inesperado procesando {base_name}.mkv: {e}")
+        finally:
+            if manifiesto:
+                try: manifiesto.anotar(base_name, "fin")
+                except OSError as e: self._emit_log(f"Error escribiendo el diario: {e}")
+            self._terminar_archivo(i)
+            self._archivo_del_hilo.medicion = None
+            medicion.terminar(success)
+            self._registrar_medicion(medicion)
+        self._emit_log(f"Procesamiento de {base_name}.mkv completado.")
+        return success
+
+    def _num_workers(self, total_files=None):
+        workers = self.workers or num_trabajadores or os.cpu_count() or 1
+        if total_files is not None: workers = min(workers, total_files or 1)
+        return max(1, workers)
+
+    def _reparte_pistas_largas(self):
+        """True si una pista larga puede repartirse en tramos, aunque se procese un solo archivo."""
+        return bool(lineas_por_fragmento) and self._num_workers() > 1
+
+    def abrir(self, total_files=None):
+        """Crea los pools de hilos y procesos y los mantiene abiertos entre lotes (p. ej. para el modo vigilante)."""
+        if self.pool_hilos is not None: return
+        workers = self._num_workers(total_files)
+        # Los hilos cubren la parte de E/S (mkvmerge, mkvextract, Gemini, guardado) y cada uno manda la
+        # reescritura de subtítulos al pool de procesos, así un archivo extrae mientras otro se reescribe.
+        # Un hilo esperando a Gemini no usa CPU, así que hay hilos de sobra para que otros archivos sigan
+        # extrayendo y reescribiendo mientras las consultas están en vuelo.
+        hilos = workers + (min(gemini_max_concurrentes, total_files or gemini_max_concurrentes) if self._gemini_activo() else 0)
+        self.pool_hilos = ThreadPoolExecutor(max_workers=max(1, hilos))
+        # Con pistas muy largas un solo archivo puede usar todos los procesos, así que el pool no se limita a la
+        # cantidad de archivos (los procesos se crean recién cuando hacen falta)
+        self._procesos = self._num_workers() if lineas_por_fragmento else workers
+        self.pool_procesos = ProcessPoolExecutor(max_workers=self._procesos) if self._procesos > 1 else None
+        # Los archivos normales solo van al pool si hay varios a la vez; con uno solo no vale la pena el proceso extra
+        self._archivos_en_procesos = workers > 1
+
+    def cerrar(self):
+        if self.pool_hilos is not None: self.pool_hilos.shutdown(wait=True)
+        if self.pool_procesos is not None: self.pool_procesos.shutdown(wait=True)
+        if self.pool_gemini is not None: self.pool_gemini.shutdown(wait=True)
+        self.pool_hilos = None
+        self.pool_procesos = None
+        self.pool_gemini = None
+        self._archivos_en_procesos = False
+
+    def __enter__(self):
+        self.abrir()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cerrar()
+
+    def enviar(self, file_path):
+        """Encola un MKV en los pools abiertos con abrir() y devuelve un Future con el resultado (bool)."""
+        if self.pool_hilos is None: raise RuntimeError("El motor no está abierto; usa abrir() o 'with motor:'")
+        self._contador_archivos += 1
+        return self.pool_hilos.submit(self._procesar_archivo, self._contador_archivos - 1, file_path)
+
+    def procesar_archivo(self, file_path):
+        """Procesa un solo MKV en el hilo actual. Devuelve True si se guardó el subtítulo."""
+        # Sin pools abiertos se abre el de procesos por si la pista es larga y conviene repartirla en tramos
+        pools_temporales = self.pool_hilos is None and self._reparte_pistas_largas()
+        if pools_temporales: self.abrir(1)
+        try: return self._procesar_archivo(0, file_path)
+        finally:
+            if pools_temporales: self.cerrar()
+
+    def procesar_lote(self, files):
+        """Procesa una lista de MKV con hasta `workers` archivos a la vez. Devuelve un bool por archivo."""
+        total_files = len(files)
+        self.current_file_total = total_files
+        self.mediciones = deque(maxlen=mediciones_max_en_memoria)
+        inicio_lote = time.perf_counter()
+        try: return self._procesar_lote(files)
+        finally:
+            self.duracion_lote = time.perf_counter() - inicio_lote
+            # Sin pools abiertos (lote en serie) no queda nadie que cierre el pool de consultas a Gemini
+            if self.pool_hilos is None and self.pool_gemini is not None:
+                self.pool_gemini.shutdown(wait=True)
+                self.pool_gemini = None
+
+    def _procesar_lote(self, files):
+        total_files = len(files)
+        resultados = [False] * total_files
+        # En serie solo si tampoco hay procesos para repartir una pista larga (un solo archivo de compilado)
+        if self.pool_hilos is None and self._num_workers(total_files) <= 1 and not self._reparte_pistas_largas():
+            for i, file_path in enumerate(files):
+                resultados[i] = self._procesar_archivo(i, file_path)
+                self.al_progreso_total(int(((i + 1) / total_files) * 100))
+            return resultados
+
+        pools_temporales = self.pool_hilos is None
+        if pools_temporales: self.abrir(total_files)
+        try:
+            futuros = {self.pool_hilos.submit(self._procesar_archivo, i, file_path): i for i, file_path in enumerate(files)}
+            for completados, futuro in enumerate(as_completed(futuros), start=1):
+                resultados[futuros[futuro]] = futuro.result()
+                self.al_progreso_total(int((completados / total_files) * 100))
+        finally:
+            if pools_temporales: self.cerrar()
+        return resultados
+
+def procesar_archivo(ruta, mode='multi', **opciones):
+    """Atajo: procesa un MKV con un motor nuevo. Las opciones son las de MotorWeebnizador."""
+    return MotorWeebnizador(mode, **opciones).procesar_archivo(ruta)
+
+def procesar_lote(rutas, mode='multi', workers=None, **opciones):
+    """Atajo: procesa varios MKV con un motor nuevo. Devuelve un bool por archivo."""
+    return MotorWeebnizador(mode, workers=workers, **opciones).procesar_lote(list(rutas))
@@ -0,0 +1,88 @@
+"""Clasificador local de pares 'Nombre Apellido' para no preguntarle a Gemini lo evidente.
+
+El patrón de dos palabras con mayúscula atrapa también cosas como "Soy Hisoka" o el comienzo de una frase.
+Con un nomenclátor de nombres y apellidos japoneses y listas de palabras del español, cada par queda:
+
+  * invertido: nombre de pila + apellido conocidos ("Naruto Uzumaki" -> "Uzumaki Naruto");
+  * descartado: alguna palabra es del español ("Soy Hisoka", "Gracias Naruto") o el par ya está
+    en orden japonés ("Uzumaki Naruto");
+  * dudoso: todo lo demás, que sí se consulta a Gemini.
+"""
+import re
+
+NOMBRES_JAPONESES = frozenset("""
+    aiko akane akari akemi akihiko akihiro akio akira amane ami anzu aoi arata asuka asuna atsuko atsushi aya ayaka
+    ayame ayano ayumi chiaki chie chihiro chika chinatsu chisato chiyo daichi daiki daisuke eiji eita emi emiko eren
+    fumiko fuyumi gaku genji goku goro hajime hana hanako haruka haruki haruko haruto hayate hayato hibiki hikari hikaru
+    himari hinata hiro hiroki hiroko hiromi hiroshi hisako hisoka hitomi honoka hotaru ichigo ichiro iori isamu itachi
+    izumi jin jiro jun junichi junko kaede kaito kakashi kana kanade kanako kaori kaoru kasumi katsuki kazuki kazuma
+    kazuo kazuya kei keiko keisuke kenji kenta kento kiko kiyoshi koharu kohaku kotaro kotone kouki kumiko kyo kyoko
+    madoka maki makoto mami mana manami mao mari mariko masaki masao masaru masato masumi mayu mayumi megumi mei
+    michiko midori mikasa miki miku minako minato minoru mio misaki misato mitsuki miyu miyuki momo momoka nagisa nami
+    nana nanami naoki naoko naomi naruto natsuki natsumi noboru nobuo noriko nozomi osamu ran ren riko rin rina rintaro
+    risa ryo ryoko ryosuke ryota ryu ryuji ryunosuke sachiko saki sakura sasuke satoru satoshi sayaka sayuri
+    seiji shigeru shin shinji shinobu shiori shizuka shota shoto shun sora sota subaru sumire suzu tadashi taichi takashi
+    takeshi takumi takuya taro tatsuya tetsuya tomoe tomoko tomoya toru tsubasa tsukasa tsumugi uta wataru yamato yoko
+    yoshiko yoshio yoshiro yu yua yui yuichi yuji yuki yukiko yuko yuma yumi yumiko yuna yuri yusuke yuto yutaka yuu
+""".split())
+
+APELLIDOS_JAPONESES = frozenset("""
+    abe aizawa akiyama amano ando aoki aoyama arai asano baba chiba endo fujii fujimoto fujita fujiwara fukuda fukushima
+    goto haruno hasegawa hashimoto hatake hayashi higashi hirano hirata hoshino hyuga ichikawa ikeda imai inoue ishida
+    ishii ishikawa ito iwasaki iwata kamado kaneko kato kawaguchi kawakami kawamura kikuchi kimura kinoshita kitagawa
+    kobayashi kojima komatsu kondo kubo kudo kurosaki kuroda maeda makino maruyama masuda matsuda matsui matsumoto
+    matsuoka miura miyamoto miyazaki mori morita murakami murata nagai nakagawa nakajima nakamura nakano nakayama
+    nishimura noguchi noda nomura ogawa ohara okada okamoto ono otsuka ozaki saito sakamoto sasaki sato shibata shimizu
+    shimada sugawara sugiyama suzuki takada takagi takahashi takano takeda tamura tanaka taniguchi todoroki uchiha ueda
+    uchida uzumaki wada watanabe yagami yamada yamaguchi yamamoto yamanaka yamashita yamazaki yano yokoyama yoshida
+    yoshikawa yoshimura
+""".split())
+
+# Palabras que nunca son un nombre: artículos, pronombres, partículas, saludos y los verbos más comunes en diálogo
+PALABRAS_NO_NOMBRE = frozenset("""
+    a al algo alguien allí ahí ahora aquí así aun aún bien bueno buena buenas buenos cada casi como cómo con cual cuál
+    cuando cuándo de del desde donde dónde el él ella ellas ellos en entonces era eran eres es esa ese eso esta está
+    estaba estamos están estás este esto estoy fue fui hasta hay la las le les lo los más me mi mí mis muy nada ni no
+    nos nosotros nuestra nuestro o oye para pero por porque pues que qué quien quién se sé ser si sí sin sobre solo sólo
+    somos son soy su sus también tan te ti todo todos tu tú tus un una uno unos usted ustedes vamos ya yo
+    adiós ah bienvenido bienvenida cállate claro cuidado disculpa eh espera gracias hola lo siento mira oh perdón
+    por favor rápido señor señora señorita señorito silencio vale vaya ven venga vete
+    dame dice digo dijo haz hazlo hice hizo puedo puede puedes quiero quiere quieres sabes sabe tengo tiene tienes
+    voy vas va vamos ve veo vi ves hace hago hemos he has ha
+    lunes martes miércoles jueves viernes sábado domingo
+""".split())
+
+# Terminaciones del español que no se dan en un nombre romanizado (adverbios, gerundios, formas verbales);
+# se dejan fuera las que también cierran nombres occidentales (Fernando, Aaron, Ramos)
+patron_sufijo_espanol = re.compile(r"(?:mente|ción|iendo|aste|iste|ieron|emos|imos|ábamos)$")
+
+class ClasificadorNombres:
+    def __init__(self, nombres=NOMBRES_JAPONESES, apellidos=APELLIDOS_JAPONESES, palabras_no_nombre=PALABRAS_NO_NOMBRE):
+        self.nombres = frozenset(nombre.lower() for nombre in nombres)
+        self.apellidos = frozenset(apellido.lower() for apellido in apellidos)
+        self.palabras_no_nombre = frozenset(palabra.lower() for palabra in palabras_no_nombre)
+
+    def _no_es_nombre(self, palabra):
+        return palabra in self.palabras_no_nombre or (palabra not in self.nombres and palabra not in self.apellidos and bool(patron_sufijo_espanol.search(palabra)))
+
+    def clasificar(self, par):
+        """Devuelve ('invertir', 'Apellido Nombre'), ('descartar', None) o ('dudoso', None) para 'Nombre Apellido'."""
+        partes = par.split()
+        if len(partes) != 2: return 'dudoso', None
+        primera, segunda = (parte.lower() for parte in partes)
+        if self._no_es_nombre(primera) or self._no_es_nombre(segunda): return 'descartar', None
+        primera_nombre, primera_apellido = primera in self.nombres, primera in self.apellidos
+        segunda_nombre, segunda_apellido = segunda in self.nombres, segunda in self.apellidos
+        # Si alguna palabra figura como nombre y como apellido a la vez el orden no es evidente
+        if primera_nombre and segunda_apellido and not (primera_apellido or segunda_nombre): return 'invertir', f"{partes[1]} {partes[0]}"
+        if primera_apellido and segunda_nombre and not (primera_nombre or segunda_apellido): return 'descartar', None
+        return 'dudoso', None
+
+    def separar(self, pares):
+        """Devuelve ({par: invertido o None} con lo decidido localmente, {pares dudosos})."""
+        decididos, dudosos = {}, set()
+        for par in pares:
+            decision, invertido = self.clasificar(par)
+            if decision == 'dudoso': dudosos.add(par)
+            else: decididos[par] = invertido
+        return decididos, dudosos
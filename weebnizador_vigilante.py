@@ -0,0 +1,143 @@
+"""Modo vigilante: procesa automáticamente los MKV que van llegando a una o varias carpetas.
+
+Usa watchdog (inotify en Linux, ReadDirectoryChangesW en Windows) si está instalado y, si no,
+revisa las carpetas cada pocos segundos. Un MKV se procesa cuando deja de crecer durante
+`segundos_estables` segundos. El motor se mantiene abierto todo el tiempo, así que las reglas
+compiladas, las caches y el cliente de Gemini se reutilizan entre archivos.
+"""
+import os
+import threading
+import time
+
+import weebnizador_motor as motor
+
+class VigilanteCarpetas:
+    def __init__(self, carpetas, mode='multi', workers=None, segundos_estables=10, intervalo_sondeo=5,
+                 recursivo=False, procesar_existentes=False, al_log=print):
+        self.carpetas = [os.path.abspath(carpeta) for carpeta in carpetas]
+        self.mode = mode
+        self.segundos_estables = segundos_estables
+        self.intervalo_sondeo = intervalo_sondeo
+        self.recursivo = recursivo
+        self.procesar_existentes = procesar_existentes
+        self.al_log = al_log or motor._ignorar
+        self.motor = motor.MotorWeebnizador(mode, workers=workers, al_log=al_log)
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._pendientes = {}   # ruta -> (tamaño, mtime_ns, momento desde el que no cambia)
+        self._procesados = {}   # ruta -> (tamaño, mtime_ns) con los que se procesó o se ignoró
+        self._en_proceso = set()
+
+    def _listar_mkv(self):
+        for carpeta in self.carpetas:
+            if self.recursivo:
+                for raiz, _, nombres in os.walk(carpeta):
+                    for nombre in nombres:
+                        if nombre.lower().endswith('.mkv'): yield os.path.join(raiz, nombre)
+            else:
+                try: nombres = os.listdir(carpeta)
+                except OSError: continue
+                for nombre in nombres:
+                    if nombre.lower().endswith('.mkv'): yield os.path.join(carpeta, nombre)
+
+    def notificar(self, ruta):
+        """Marca una ruta como posible candidata. Los .ass/.srt despiertan a su MKV (necesario en modo extra)."""
+        ruta = os.path.abspath(ruta)
+        base, extension = os.path.splitext(ruta)
+        extension = extension.lower()
+        if extension in ('.ass', '.srt'):
+            # Respaldos propios: <base>_original y <base>_original.N
+            if base.endswith('_original') or os.path.splitext(base)[0].endswith('_original'): return
+            ruta = base + '.mkv'
+        elif extension != '.mkv':
+            return
+        with self._lock:
+            if ruta not in self._en_proceso: self._pendientes.setdefault(ruta, None)
+
+    def _listo_para_procesar(self, ruta):
+        if self.mode == 'extra':
+            base = os.path.splitext(ruta)[0]
+            if not (os.path.isfile(base + '.ass') or os.path.isfile(base + '.srt')): return False
+        try:
+            # En Windows falla mientras el programa de descarga mantenga el archivo bloqueado
+            with open(ruta, 'rb') as f: f.read(1)
+        except OSError:
+            return False
+        return True
+
+    def _revisar_pendientes(self):
+        ahora = time.monotonic()
+        listos = []
+        with self._lock:
+            for ruta, anterior in list(self._pendientes.items()):
+                try: info = os.stat(ruta)
+                except OSError:
+                    del self._pendientes[ruta]; continue
+                identidad = (info.st_size, info.st_mtime_ns)
+                if self._procesados.get(ruta) == identidad:
+                    del self._pendientes[ruta]; continue
+                if anterior is None or anterior[:2] != identidad:
+                    self._pendientes[ruta] = identidad + (ahora,)
+                elif ahora - anterior[2] >= self.segundos_estables and self._listo_para_procesar(ruta):
+                    del self._pendientes[ruta]
+                    self._en_proceso.add(ruta)
+                    listos.append((ruta, identidad))
+        for ruta, identidad in listos:
+            self.al_log(f"Nuevo archivo listo: {ruta}")
+            futuro = self.motor.enviar(ruta)
+            futuro.add_done_callback(lambda _, ruta=ruta, identidad=identidad: self._terminado(ruta, identidad))
+
+    def _terminado(self, ruta, identidad):
+        with self._lock:
+            self._en_proceso.discard(ruta)
+            self._procesados[ruta] = identidad
+
+    def _iniciar_observador(self):
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            self.al_log(f"watchdog no está instalado; se revisarán las carpetas cada {self.intervalo_sondeo} s.")
+            return None
+        vigilante = self
+
+        class Manejador(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory: return
+                vigilante.notificar(getattr(event, 'dest_path', '') or event.src_path)
+
+        observador = Observer()
+        for carpeta in self.carpetas:
+            observador.schedule(Manejador(), carpeta, recursive=self.recursivo)
+        observador.start()
+        return observador
+
+    def ejecutar(self):
+        """Vigila las carpetas hasta que se llame a detener() o se pulse Ctrl+C."""
+        for ruta in self._listar_mkv():
+            if self.procesar_existentes: self.notificar(ruta)
+            else:
+                try: info = os.stat(ruta)
+                except OSError: continue
+                self._procesados[os.path.abspath(ruta)] = (info.st_size, info.st_mtime_ns)
+        self.al_log(f"Vigilando {', '.join(self.carpetas)} (modo {self.mode}). Ctrl+C para salir.")
+        with self.motor:
+            observador = self._iniciar_observador()
+            ultimo_sondeo = time.monotonic()
+            try:
+                while not self._detener.is_set():
+                    # Sin watchdog se sondea; con watchdog el sondeo lento solo cubre eventos perdidos
+                    intervalo = self.intervalo_sondeo if observador is None else max(60, self.intervalo_sondeo)
+                    if time.monotonic() - ultimo_sondeo >= intervalo:
+                        for ruta in self._listar_mkv(): self.notificar(ruta)
+                        ultimo_sondeo = time.monotonic()
+                    self._revisar_pendientes()
+                    self._detener.wait(1)
+            except KeyboardInterrupt:
+                self.al_log("Deteniendo el vigilante...")
+            finally:
+                if observador is not None:
+                    observador.stop(); observador.join()
+
+    def detener(self):
+        self._detener.set()